@@ -205,7 +205,7 @@ def main():
         logger.error(f"Server error: {e}")
         sys.exit(1)
     finally:
-        cluster_manager.executor.shutdown(wait=True)
+        cluster_manager.close()
 
 
 if __name__ == "__main__":
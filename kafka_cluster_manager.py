@@ -5,19 +5,40 @@ Handles cluster configuration, connections, and AdminClient management.
 
 import logging
 import os
-from typing import Dict, Optional
+import re
+import threading
+from typing import Dict, Mapping, Optional, Tuple
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor
+from weakref import WeakValueDictionary
 
 from confluent_kafka.admin import AdminClient
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# AdminClients shared by every cluster config pointing at the same brokers with the same credentials.
+# Weak references let a librdkafka handle go away once no manager uses it anymore.
+_SHARED_ADMIN_CLIENTS: "WeakValueDictionary[Tuple, AdminClient]" = WeakValueDictionary()
+# Serializes AdminClient creation so concurrent first calls from executor threads build a single client.
+_ADMIN_CLIENT_LOCK = threading.Lock()
 
-@dataclass
+# Extra librdkafka settings for test runs (KAFKA_TEST_PROFILE=1): refresh metadata less often than
+# the librdkafka defaults (300000 and 900000 ms) to keep background thread CPU low while the suite runs.
+TEST_PROFILE_CONFIG = {
+    "topic.metadata.refresh.interval.ms": "600000",
+    "metadata.max.age.ms": "1800000",
+}
+
+
+def _test_profile_enabled(env: Mapping[str, str]) -> bool:
+    """Whether KAFKA_TEST_PROFILE asks for the test librdkafka settings."""
+    return env.get("KAFKA_TEST_PROFILE", "false").lower() in ("1", "true")
+
+
+@dataclass(slots=True, frozen=True)
 class KafkaClusterConfig:
-    """Configuration for a Kafka cluster connection."""
+    """Configuration for a Kafka cluster connection; immutable once loaded."""
 
     name: str
     bootstrap_servers: str
@@ -30,25 +51,55 @@ class KafkaClusterConfig:
     ssl_key_location: Optional[str] = None
     viewonly: bool = False
 
+    def connection_key(self) -> Tuple[Optional[str], ...]:
+        """Key identifying the broker connection, independent of the cluster name and viewonly flag."""
+        return (
+            self.bootstrap_servers,
+            self.security_protocol,
+            self.sasl_mechanism,
+            self.sasl_username,
+            self.sasl_password,
+            self.ssl_ca_location,
+            self.ssl_certificate_location,
+            self.ssl_key_location,
+        )
+
 
 class KafkaClusterManager:
     """Manages Kafka cluster connections and operations."""
 
-    def __init__(self):
+    def __init__(self, test_mode: Optional[bool] = None):
         self.clusters: Dict[str, KafkaClusterConfig] = {}
         self.admin_clients: Dict[str, AdminClient] = {}
         self.executor = ThreadPoolExecutor(max_workers=10)
+        if test_mode is None:
+            test_mode = _test_profile_enabled(os.environ)
+        self.test_mode = test_mode
 
     def add_cluster(self, config: KafkaClusterConfig):
-        """Add a cluster configuration."""
+        """Add a cluster configuration; its AdminClient is created on first use."""
         self.clusters[config.name] = config
-        self._create_admin_client(config)
+        self.admin_clients.pop(config.name, None)
+
+    def _create_admin_client(self, config: KafkaClusterConfig) -> AdminClient:
+        """Create an AdminClient for the cluster, reusing a shared one for identical connections."""
+        key = config.connection_key() + (self.test_mode,)
+        admin_client = _SHARED_ADMIN_CLIENTS.get(key)
+        if admin_client is None:
+            admin_client = AdminClient(self._build_kafka_config(config))
+            _SHARED_ADMIN_CLIENTS[key] = admin_client
 
-    def _create_admin_client(self, config: KafkaClusterConfig):
-        """Create an AdminClient for the cluster."""
+        self.admin_clients[config.name] = admin_client
+        return admin_client
+
+    def _build_kafka_config(self, config: KafkaClusterConfig) -> Dict[str, str]:
+        """Build the librdkafka configuration for the cluster."""
         kafka_config = {
             "bootstrap.servers": config.bootstrap_servers,
             "security.protocol": config.security_protocol,
+            # AdminClient is a producer-type handle, where this defaults to true; a single-topic
+            # metadata lookup must never create the topic on the broker
+            "allow.auto.create.topics": "false",
         }
 
         if config.sasl_mechanism:
@@ -63,23 +114,21 @@ class KafkaClusterManager:
             kafka_config["ssl.certificate.location"] = config.ssl_certificate_location
         if config.ssl_key_location:
             kafka_config["ssl.key.location"] = config.ssl_key_location
+        if self.test_mode:
+            kafka_config.update(TEST_PROFILE_CONFIG)
 
-        self.admin_clients[config.name] = AdminClient(kafka_config)
+        return kafka_config
 
     def get_admin_client(self, cluster_name: Optional[str] = None) -> AdminClient:
-        """Get AdminClient for specified cluster or default."""
-        if cluster_name is None:
-            if len(self.admin_clients) == 1:
-                return list(self.admin_clients.values())[0]
-            elif "default" in self.admin_clients:
-                return self.admin_clients["default"]
-            else:
-                raise ValueError("Multiple clusters available, please specify cluster_name")
-
-        if cluster_name not in self.admin_clients:
-            raise ValueError(f"Cluster '{cluster_name}' not found")
-
-        return self.admin_clients[cluster_name]
+        """Get AdminClient for specified cluster or default, creating and caching it on first use."""
+        config = self.get_cluster_config(cluster_name)
+        admin_client = self.admin_clients.get(config.name)
+        if admin_client is None:
+            with _ADMIN_CLIENT_LOCK:
+                admin_client = self.admin_clients.get(config.name)
+                if admin_client is None:
+                    admin_client = self._create_admin_client(config)
+        return admin_client
 
     def get_cluster_config(self, cluster_name: Optional[str] = None) -> KafkaClusterConfig:
         """Get cluster configuration."""
@@ -101,49 +150,64 @@ class KafkaClusterManager:
         config = self.get_cluster_config(cluster_name)
         return config.viewonly
 
-
-def load_cluster_configurations() -> KafkaClusterManager:
-    """Load cluster configurations from environment variables."""
-    manager = KafkaClusterManager()
+    def close(self):
+        """Release the cached AdminClients and shut down the executor."""
+        # AdminClient has no close(); its librdkafka handle is freed once the last reference goes
+        self.admin_clients.clear()
+        self.executor.shutdown(wait=True)
+
+
+# Multi-cluster mode supports KAFKA_CLUSTER_NAME_1 .. KAFKA_CLUSTER_NAME_<MAX_CLUSTERS>
+MAX_CLUSTERS = 8
+_CLUSTER_NAME_KEY = re.compile(r"KAFKA_CLUSTER_NAME_([1-9]\d*)")
+
+# Optional KafkaClusterConfig fields read from the environment, keyed by field name; each
+# variable takes a _<i> suffix in multi-cluster mode
+_CONFIG_ENV_KEYS = {
+    "sasl_mechanism": "KAFKA_SASL_MECHANISM",
+    "sasl_username": "KAFKA_SASL_USERNAME",
+    "sasl_password": "KAFKA_SASL_PASSWORD",
+    "ssl_ca_location": "KAFKA_SSL_CA_LOCATION",
+    "ssl_certificate_location": "KAFKA_SSL_CERTIFICATE_LOCATION",
+    "ssl_key_location": "KAFKA_SSL_KEY_LOCATION",
+}
+
+
+def _config_from_env(env: Dict[str, str], name: str, bootstrap_servers: str, suffix: str = "") -> KafkaClusterConfig:
+    """Build a KafkaClusterConfig from the environment variables carrying the given suffix."""
+    settings = {field: env.get(key + suffix) for field, key in _CONFIG_ENV_KEYS.items()}
+    return KafkaClusterConfig(
+        name=name,
+        bootstrap_servers=bootstrap_servers,
+        security_protocol=env.get("KAFKA_SECURITY_PROTOCOL" + suffix, "PLAINTEXT"),
+        viewonly=env.get("VIEWONLY" + suffix, "false").lower() == "true",
+        **settings,
+    )
+
+
+def load_cluster_configurations(env: Optional[Mapping[str, str]] = None) -> KafkaClusterManager:
+    """Load cluster configurations from environment variables, or from env when given."""
+    # One snapshot of the environment; every lookup below is a plain dict access
+    env = dict(os.environ if env is None else env)
+    manager = KafkaClusterManager(test_mode=_test_profile_enabled(env))
 
     # Check for single cluster mode first
-    bootstrap_servers = os.getenv("KAFKA_BOOTSTRAP_SERVERS")
+    bootstrap_servers = env.get("KAFKA_BOOTSTRAP_SERVERS")
     if bootstrap_servers:
-        config = KafkaClusterConfig(
-            name="default",
-            bootstrap_servers=bootstrap_servers,
-            security_protocol=os.getenv("KAFKA_SECURITY_PROTOCOL", "PLAINTEXT"),
-            sasl_mechanism=os.getenv("KAFKA_SASL_MECHANISM"),
-            sasl_username=os.getenv("KAFKA_SASL_USERNAME"),
-            sasl_password=os.getenv("KAFKA_SASL_PASSWORD"),
-            ssl_ca_location=os.getenv("KAFKA_SSL_CA_LOCATION"),
-            ssl_certificate_location=os.getenv("KAFKA_SSL_CERTIFICATE_LOCATION"),
-            ssl_key_location=os.getenv("KAFKA_SSL_KEY_LOCATION"),
-            viewonly=os.getenv("VIEWONLY", "false").lower() == "true",
-        )
-        manager.add_cluster(config)
+        manager.add_cluster(_config_from_env(env, "default", bootstrap_servers))
         logger.info(f"Loaded single cluster configuration: {bootstrap_servers}")
         return manager
 
-    # Check for multi-cluster mode
-    for i in range(1, 9):  # Support up to 8 clusters
-        name = os.getenv(f"KAFKA_CLUSTER_NAME_{i}")
-        servers = os.getenv(f"KAFKA_BOOTSTRAP_SERVERS_{i}")
+    # Check for multi-cluster mode, visiting only the slots that have a cluster name set
+    indices = sorted(int(match.group(1)) for match in map(_CLUSTER_NAME_KEY.fullmatch, env) if match)
+    for i in indices:
+        if i > MAX_CLUSTERS:
+            break
+        name = env[f"KAFKA_CLUSTER_NAME_{i}"]
+        servers = env.get(f"KAFKA_BOOTSTRAP_SERVERS_{i}")
 
         if name and servers:
-            config = KafkaClusterConfig(
-                name=name,
-                bootstrap_servers=servers,
-                security_protocol=os.getenv(f"KAFKA_SECURITY_PROTOCOL_{i}", "PLAINTEXT"),
-                sasl_mechanism=os.getenv(f"KAFKA_SASL_MECHANISM_{i}"),
-                sasl_username=os.getenv(f"KAFKA_SASL_USERNAME_{i}"),
-                sasl_password=os.getenv(f"KAFKA_SASL_PASSWORD_{i}"),
-                ssl_ca_location=os.getenv(f"KAFKA_SSL_CA_LOCATION_{i}"),
-                ssl_certificate_location=os.getenv(f"KAFKA_SSL_CERTIFICATE_LOCATION_{i}"),
-                ssl_key_location=os.getenv(f"KAFKA_SSL_KEY_LOCATION_{i}"),
-                viewonly=os.getenv(f"VIEWONLY_{i}", "false").lower() == "true",
-            )
-            manager.add_cluster(config)
+            manager.add_cluster(_config_from_env(env, name, servers, f"_{i}"))
             logger.info(f"Loaded cluster configuration: {name} -> {servers}")
 
     if not manager.clusters:
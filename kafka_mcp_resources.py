@@ -3,9 +3,11 @@ Kafka MCP Resources Module
 Defines all MCP resources (kafka:// endpoints) for cluster status, brokers, topics, etc.
 """
 
+import asyncio
 import json
 import time
-from typing import TYPE_CHECKING
+from functools import partial
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypedDict, Union
 
 if TYPE_CHECKING:
     from kafka_cluster_manager import KafkaClusterManager
@@ -13,38 +15,120 @@ if TYPE_CHECKING:
 # Global cluster manager - will be set by main module
 cluster_manager: "KafkaClusterManager" = None
 
+# How long list_topics() metadata is reused before asking the brokers again
+METADATA_TTL_SECONDS = 5.0
+
+# (cluster name, topic or None) -> (fetched at, admin client, metadata); lets the brokers, topics,
+# partitions and health resources share one MetadataRequest per cluster within the TTL. Expired
+# entries are swept on every insert, so only keys fetched within the last TTL are kept.
+_metadata_cache: Dict[Tuple[str, Optional[str]], Tuple[float, Any, Any]] = {}
+
+
+class BrokerEntry(TypedDict):
+    """One broker as listed by the brokers resources."""
+
+    broker_id: int
+    host: str
+    port: int
+    rack: Optional[str]
+    cluster: str
+
+
+class ErrorEntry(TypedDict):
+    """Stands in for the entry list of a cluster whose collector failed."""
+
+    error: str
+    status: str
+
+
+# Per-cluster value of the all-cluster resources: the cluster's entries, or why they are missing
+ClusterEntries = Union[List[Dict[str, Any]], ErrorEntry]
+
 
 def set_cluster_manager(manager: "KafkaClusterManager"):
     """Set the global cluster manager instance."""
     global cluster_manager
     cluster_manager = manager
+    clear_metadata_cache()
 
 
-async def get_cluster_status() -> str:
-    """Get real-time cluster status information."""
-    status = {"clusters": {}, "timestamp": time.time()}
+def clear_metadata_cache():
+    """Drop all cached cluster metadata."""
+    _metadata_cache.clear()
 
-    for name, config in cluster_manager.clusters.items():
-        try:
-            admin_client = cluster_manager.get_admin_client(name)
-            metadata = admin_client.list_topics(timeout=10)
 
-            status["clusters"][name] = {
-                "name": name,
-                "bootstrap_servers": config.bootstrap_servers,
-                "viewonly": config.viewonly,
-                "topics_count": len(metadata.topics),
-                "brokers_count": len(metadata.brokers),
-                "status": "healthy",
-            }
-        except Exception as e:
-            status["clusters"][name] = {
-                "name": name,
-                "bootstrap_servers": config.bootstrap_servers,
-                "viewonly": config.viewonly,
-                "status": "error",
-                "error": str(e),
-            }
+async def _get_cached_metadata(cluster_name: str, topic: Optional[str] = None):
+    """Get list_topics() metadata for a cluster, reusing a fetch younger than METADATA_TTL_SECONDS.
+
+    With a topic, only that topic's metadata is requested from the brokers.
+    """
+    admin_client = cluster_manager.get_admin_client(cluster_name)
+    now = time.monotonic()
+
+    key = (cluster_name, topic)
+    entry = _metadata_cache.get(key)
+    # A cached entry only counts for the admin client that produced it
+    if entry is not None and entry[1] is admin_client and now - entry[0] < METADATA_TTL_SECONDS:
+        return entry[2]
+
+    # list_topics() blocks on a broker round trip; run it on the manager's executor, like the tools do
+    metadata = await asyncio.get_running_loop().run_in_executor(
+        cluster_manager.executor, partial(admin_client.list_topics, topic=topic, timeout=10)
+    )
+    _sweep_expired_metadata(now)
+    _metadata_cache[key] = (now, admin_client, metadata)
+    return metadata
+
+
+def _sweep_expired_metadata(now: float):
+    """Drop cache entries older than METADATA_TTL_SECONDS."""
+    expired = [key for key, entry in _metadata_cache.items() if now - entry[0] >= METADATA_TTL_SECONDS]
+    for key in expired:
+        del _metadata_cache[key]
+
+
+async def _gather_clusters(collect: Callable[[str], Awaitable[Dict[str, Any]]], key: str) -> Dict[str, ClusterEntries]:
+    """Run a per-cluster collector for every cluster concurrently and key its `key` entries by cluster.
+
+    Clusters whose collector reported an error map to {"error", "status": "failed"} instead.
+    """
+    names = list(cluster_manager.clusters.keys())
+    results = await asyncio.gather(*(collect(name) for name in names))
+    return {
+        name: data[key] if "error" not in data else {"error": data["error"], "status": "failed"}
+        for name, data in zip(names, results)
+    }
+
+
+async def _get_cluster_status_data(name: str) -> Dict[str, Any]:
+    """Collect status information for a specific cluster."""
+    config = cluster_manager.clusters[name]
+    try:
+        metadata = await _get_cached_metadata(name)
+
+        return {
+            "name": name,
+            "bootstrap_servers": config.bootstrap_servers,
+            "viewonly": config.viewonly,
+            "topics_count": len(metadata.topics),
+            "brokers_count": len(metadata.brokers),
+            "status": "healthy",
+        }
+    except Exception as e:
+        return {
+            "name": name,
+            "bootstrap_servers": config.bootstrap_servers,
+            "viewonly": config.viewonly,
+            "status": "error",
+            "error": str(e),
+        }
+
+
+async def get_cluster_status() -> str:
+    """Get real-time cluster status information."""
+    names = list(cluster_manager.clusters.keys())
+    results = await asyncio.gather(*(_get_cluster_status_data(name) for name in names))
+    status = {"clusters": dict(zip(names, results)), "timestamp": time.time()}
 
     return json.dumps(status, indent=2)
 
@@ -76,182 +160,116 @@ async def get_cluster_info() -> str:
     return json.dumps(info, indent=2)
 
 
-async def get_brokers_resource() -> str:
-    """Get all brokers across all clusters as a resource."""
-    brokers_data = {"brokers": {}, "timestamp": time.time()}
+async def _get_brokers_data() -> Dict[str, Any]:
+    """Collect brokers across all clusters."""
+    return {"brokers": await _gather_clusters(_get_cluster_brokers_data, "brokers"), "timestamp": time.time()}
 
-    for cluster_name in cluster_manager.clusters.keys():
-        try:
-            admin_client = cluster_manager.get_admin_client(cluster_name)
-            metadata = admin_client.list_topics(timeout=10)
 
-            brokers_data["brokers"][cluster_name] = []
-            for broker_id, broker_metadata in metadata.brokers.items():
-                brokers_data["brokers"][cluster_name].append(
-                    {
-                        "broker_id": broker_id,
-                        "host": broker_metadata.host,
-                        "port": broker_metadata.port,
-                        "rack": getattr(broker_metadata, "rack", None),
-                        "cluster": cluster_name,
-                    }
-                )
+async def get_brokers_resource() -> str:
+    """Get all brokers across all clusters as a resource."""
+    return json.dumps(await _get_brokers_data(), indent=2)
 
-        except Exception as e:
-            brokers_data["brokers"][cluster_name] = {"error": str(e), "status": "failed"}
 
-    return json.dumps(brokers_data, indent=2)
+async def _get_topics_data() -> Dict[str, Any]:
+    """Collect topics across all clusters."""
+    return {"topics": await _gather_clusters(_get_cluster_topics_data, "topics"), "timestamp": time.time()}
 
 
 async def get_topics_resource() -> str:
     """Get all topics across all clusters as a resource."""
-    topics_data = {"topics": {}, "timestamp": time.time()}
-
-    for cluster_name in cluster_manager.clusters.keys():
-        try:
-            admin_client = cluster_manager.get_admin_client(cluster_name)
-            metadata = admin_client.list_topics(timeout=10)
-
-            topics_data["topics"][cluster_name] = []
-            for topic_name, topic_metadata in metadata.topics.items():
-                if not topic_name.startswith("__"):  # Filter internal topics
-                    topics_data["topics"][cluster_name].append(
-                        {
-                            "name": topic_name,
-                            "partitions": len(topic_metadata.partitions),
-                            "replication_factor": (
-                                len(topic_metadata.partitions[0].replicas) if topic_metadata.partitions else 0
-                            ),
-                            "internal": False,
-                            "cluster": cluster_name,
-                        }
-                    )
-
-        except Exception as e:
-            topics_data["topics"][cluster_name] = {"error": str(e), "status": "failed"}
-
-    return json.dumps(topics_data, indent=2)
+    return json.dumps(await _get_topics_data(), indent=2)
 
 
-async def get_consumer_groups_resource() -> str:
-    """Get all consumer groups across all clusters as a resource."""
-    groups_data = {"consumer_groups": {}, "timestamp": time.time()}
+async def _get_consumer_groups_data() -> Dict[str, Any]:
+    """Collect consumer groups across all clusters."""
+    return {
+        "consumer_groups": await _gather_clusters(_get_cluster_consumer_groups_data, "consumer_groups"),
+        "timestamp": time.time(),
+    }
 
-    for cluster_name in cluster_manager.clusters.keys():
-        try:
-            admin_client = cluster_manager.get_admin_client(cluster_name)
-            result = admin_client.list_consumer_groups(timeout=10)
 
-            groups_data["consumer_groups"][cluster_name] = []
-            for group in result.result():
-                groups_data["consumer_groups"][cluster_name].append(
-                    {
-                        "group_id": group.group_id,
-                        "is_simple_consumer_group": group.is_simple_consumer_group,
-                        "state": group.state.name if hasattr(group, "state") else "UNKNOWN",
-                        "cluster": cluster_name,
-                    }
-                )
+async def get_consumer_groups_resource() -> str:
+    """Get all consumer groups across all clusters as a resource."""
+    return json.dumps(await _get_consumer_groups_data(), indent=2)
 
-        except Exception as e:
-            groups_data["consumer_groups"][cluster_name] = {"error": str(e), "status": "failed"}
 
-    return json.dumps(groups_data, indent=2)
+async def _get_partitions_data(topic: Optional[str] = None) -> Dict[str, Any]:
+    """Collect partitions across all clusters, optionally for a single topic."""
+    collect = partial(_get_cluster_partitions_data, topic=topic)
+    return {"partitions": await _gather_clusters(collect, "partitions"), "timestamp": time.time()}
 
 
 async def get_partitions_resource() -> str:
     """Get all partitions across all clusters as a resource."""
-    partitions_data = {"partitions": {}, "timestamp": time.time()}
-
-    for cluster_name in cluster_manager.clusters.keys():
-        try:
-            admin_client = cluster_manager.get_admin_client(cluster_name)
-            metadata = admin_client.list_topics(timeout=10)
-
-            partitions_data["partitions"][cluster_name] = []
-            for topic_name, topic_metadata in metadata.topics.items():
-                if not topic_name.startswith("__"):  # Filter internal topics
-                    for partition_id, partition_metadata in topic_metadata.partitions.items():
-                        partitions_data["partitions"][cluster_name].append(
-                            {
-                                "topic": topic_name,
-                                "partition_id": partition_id,
-                                "leader": partition_metadata.leader,
-                                "replicas": partition_metadata.replicas,
-                                "in_sync_replicas": partition_metadata.isrs,
-                                "error": str(partition_metadata.error) if partition_metadata.error else None,
-                                "cluster": cluster_name,
-                            }
-                        )
-
-        except Exception as e:
-            partitions_data["partitions"][cluster_name] = {"error": str(e), "status": "failed"}
-
-    return json.dumps(partitions_data, indent=2)
+    return json.dumps(await _get_partitions_data(), indent=2)
 
 
-async def get_cluster_brokers_resource(name: str) -> str:
-    """Get brokers for a specific cluster."""
+async def _get_cluster_brokers_data(name: str) -> Dict[str, Any]:
+    """Collect broker information for a specific cluster."""
     try:
-        admin_client = cluster_manager.get_admin_client(name)
-        metadata = admin_client.list_topics(timeout=10)
+        metadata = await _get_cached_metadata(name)
+
+        brokers: List[BrokerEntry] = [
+            {
+                "broker_id": broker_id,
+                "host": broker_metadata.host,
+                "port": broker_metadata.port,
+                "rack": getattr(broker_metadata, "rack", None),
+                "cluster": name,
+            }
+            for broker_id, broker_metadata in metadata.brokers.items()
+        ]
 
-        brokers_data = {"cluster": name, "brokers": [], "timestamp": time.time()}
+        return {"cluster": name, "brokers": brokers, "timestamp": time.time()}
 
-        for broker_id, broker_metadata in metadata.brokers.items():
-            brokers_data["brokers"].append(
-                {
-                    "broker_id": broker_id,
-                    "host": broker_metadata.host,
-                    "port": broker_metadata.port,
-                    "rack": getattr(broker_metadata, "rack", None),
-                    "cluster": name,
-                }
-            )
+    except Exception as e:
+        return {"cluster": name, "error": str(e), "status": "failed", "timestamp": time.time()}
 
-        return json.dumps(brokers_data, indent=2)
 
-    except Exception as e:
-        error_data = {"cluster": name, "error": str(e), "status": "failed", "timestamp": time.time()}
-        return json.dumps(error_data, indent=2)
+async def get_cluster_brokers_resource(name: str) -> str:
+    """Get brokers for a specific cluster."""
+    return json.dumps(await _get_cluster_brokers_data(name), indent=2)
 
 
-async def get_cluster_topics_resource(name: str) -> str:
-    """Get topics for a specific cluster."""
+async def _get_cluster_topics_data(name: str) -> Dict[str, Any]:
+    """Collect topic information for a specific cluster."""
     try:
-        admin_client = cluster_manager.get_admin_client(name)
-        metadata = admin_client.list_topics(timeout=10)
+        metadata = await _get_cached_metadata(name)
+
+        topics = [
+            {
+                "name": topic_name,
+                "partitions": len(topic_metadata.partitions),
+                "replication_factor": len(topic_metadata.partitions[0].replicas) if topic_metadata.partitions else 0,
+                "internal": False,
+                "cluster": name,
+            }
+            for topic_name, topic_metadata in metadata.topics.items()
+            if not topic_name.startswith("__")  # Filter internal topics
+        ]
 
-        topics_data = {"cluster": name, "topics": [], "timestamp": time.time()}
+        return {"cluster": name, "topics": topics, "timestamp": time.time()}
 
-        for topic_name, topic_metadata in metadata.topics.items():
-            if not topic_name.startswith("__"):  # Filter internal topics
-                topics_data["topics"].append(
-                    {
-                        "name": topic_name,
-                        "partitions": len(topic_metadata.partitions),
-                        "replication_factor": len(topic_metadata.partitions[0].replicas) if topic_metadata.partitions else 0,
-                        "internal": False,
-                        "cluster": name,
-                    }
-                )
+    except Exception as e:
+        return {"cluster": name, "error": str(e), "status": "failed", "timestamp": time.time()}
 
-        return json.dumps(topics_data, indent=2)
 
-    except Exception as e:
-        error_data = {"cluster": name, "error": str(e), "status": "failed", "timestamp": time.time()}
-        return json.dumps(error_data, indent=2)
+async def get_cluster_topics_resource(name: str) -> str:
+    """Get topics for a specific cluster."""
+    return json.dumps(await _get_cluster_topics_data(name), indent=2)
 
 
-async def get_cluster_consumer_groups_resource(name: str) -> str:
-    """Get consumer groups for a specific cluster."""
+async def _get_cluster_consumer_groups_data(name: str) -> Dict[str, Any]:
+    """Collect consumer group information for a specific cluster."""
     try:
         admin_client = cluster_manager.get_admin_client(name)
-        result = admin_client.list_consumer_groups(timeout=10)
+        groups = await asyncio.get_running_loop().run_in_executor(
+            cluster_manager.executor, lambda: admin_client.list_consumer_groups(timeout=10).result()
+        )
 
         groups_data = {"cluster": name, "consumer_groups": [], "timestamp": time.time()}
 
-        for group in result.result():
+        for group in groups:
             groups_data["consumer_groups"].append(
                 {
                     "group_id": group.group_id,
@@ -261,49 +279,53 @@ async def get_cluster_consumer_groups_resource(name: str) -> str:
                 }
             )
 
-        return json.dumps(groups_data, indent=2)
+        return groups_data
 
     except Exception as e:
-        error_data = {"cluster": name, "error": str(e), "status": "failed", "timestamp": time.time()}
-        return json.dumps(error_data, indent=2)
+        return {"cluster": name, "error": str(e), "status": "failed", "timestamp": time.time()}
 
 
-async def get_cluster_partitions_resource(name: str) -> str:
-    """Get partitions for a specific cluster."""
+async def get_cluster_consumer_groups_resource(name: str) -> str:
+    """Get consumer groups for a specific cluster."""
+    return json.dumps(await _get_cluster_consumer_groups_data(name), indent=2)
+
+
+async def _get_cluster_partitions_data(name: str, topic: Optional[str] = None) -> Dict[str, Any]:
+    """Collect partition information for a specific cluster, optionally for a single topic."""
     try:
-        admin_client = cluster_manager.get_admin_client(name)
-        metadata = admin_client.list_topics(timeout=10)
-
-        partitions_data = {"cluster": name, "partitions": [], "timestamp": time.time()}
-
-        for topic_name, topic_metadata in metadata.topics.items():
-            if not topic_name.startswith("__"):  # Filter internal topics
-                for partition_id, partition_metadata in topic_metadata.partitions.items():
-                    partitions_data["partitions"].append(
-                        {
-                            "topic": topic_name,
-                            "partition_id": partition_id,
-                            "leader": partition_metadata.leader,
-                            "replicas": partition_metadata.replicas,
-                            "in_sync_replicas": partition_metadata.isrs,
-                            "error": str(partition_metadata.error) if partition_metadata.error else None,
-                            "cluster": name,
-                        }
-                    )
-
-        return json.dumps(partitions_data, indent=2)
+        metadata = await _get_cached_metadata(name, topic)
+
+        partitions = [
+            {
+                "topic": topic_name,
+                "partition_id": partition_id,
+                "leader": partition_metadata.leader,
+                "replicas": partition_metadata.replicas,
+                "in_sync_replicas": partition_metadata.isrs,
+                "error": str(partition_metadata.error) if partition_metadata.error else None,
+                "cluster": name,
+            }
+            for topic_name, topic_metadata in metadata.topics.items()
+            if not topic_name.startswith("__")  # Filter internal topics
+            for partition_id, partition_metadata in topic_metadata.partitions.items()
+        ]
+
+        return {"cluster": name, "partitions": partitions, "timestamp": time.time()}
 
     except Exception as e:
-        error_data = {"cluster": name, "error": str(e), "status": "failed", "timestamp": time.time()}
-        return json.dumps(error_data, indent=2)
+        return {"cluster": name, "error": str(e), "status": "failed", "timestamp": time.time()}
 
 
-async def get_cluster_health_resource(name: str) -> str:
-    """Get comprehensive health information for a specific cluster."""
+async def get_cluster_partitions_resource(name: str, topic: Optional[str] = None) -> str:
+    """Get partitions for a specific cluster, optionally for a single topic."""
+    return json.dumps(await _get_cluster_partitions_data(name, topic), indent=2)
+
+
+async def _get_cluster_health_data(name: str) -> Dict[str, Any]:
+    """Collect health metrics for a specific cluster."""
     try:
-        admin_client = cluster_manager.get_admin_client(name)
         config = cluster_manager.get_cluster_config(name)
-        metadata = admin_client.list_topics(timeout=10)
+        metadata = await _get_cached_metadata(name)
 
         # Calculate health metrics
         total_topics = len([t for t in metadata.topics.keys() if not t.startswith("__")])
@@ -336,8 +358,12 @@ async def get_cluster_health_resource(name: str) -> str:
             "timestamp": time.time(),
         }
 
-        return json.dumps(health_data, indent=2)
+        return health_data
 
     except Exception as e:
-        error_data = {"cluster": name, "error": str(e), "status": "failed", "timestamp": time.time()}
-        return json.dumps(error_data, indent=2)
+        return {"cluster": name, "error": str(e), "status": "failed", "timestamp": time.time()}
+
+
+async def get_cluster_health_resource(name: str) -> str:
+    """Get comprehensive health information for a specific cluster."""
+    return json.dumps(await _get_cluster_health_data(name), indent=2)
@@ -4,18 +4,19 @@ Defines all MCP tools (@mcp.tool functions) for Kafka operations.
 """
 
 import asyncio
-import json
 import logging
+from functools import partial
+from itertools import chain
 from typing import Any, Dict, List, Optional, TYPE_CHECKING
 
 from confluent_kafka import Consumer, TopicPartition
 from confluent_kafka.admin import ConfigResource
 
 import kafka_mcp_resources
-from kafka_mcp_resources import get_cluster_partitions_resource, get_partitions_resource, get_cluster_health_resource
 
 if TYPE_CHECKING:
     from kafka_cluster_manager import KafkaClusterManager
+    from kafka_mcp_resources import ClusterEntries
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -30,6 +31,25 @@ def set_cluster_manager(manager: "KafkaClusterManager"):
     cluster_manager = manager
 
 
+def _merge_cluster_entries(per_cluster: Dict[str, "ClusterEntries"], label: str) -> List[Dict[str, Any]]:
+    """Concatenate per-cluster entry lists into one list, logging clusters that failed."""
+    entry_lists = []
+    for cluster_name, entries in per_cluster.items():
+        match entries:
+            case list():
+                entry_lists.append(entries)
+            case {"error": error}:
+                logger.error(f"Error getting {label} from cluster '{cluster_name}': {error}")
+
+    return list(chain.from_iterable(entry_lists))
+
+
+async def _fetch_metadata(admin_client, topic: Optional[str] = None):
+    """Fetch cluster metadata on the executor, optionally for a single topic."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cluster_manager.executor, partial(admin_client.list_topics, topic=topic, timeout=10))
+
+
 async def list_clusters() -> List[Dict[str, Any]]:
     """List all configured Kafka clusters."""
     clusters = []
@@ -68,26 +88,18 @@ async def list_topics(cluster: Optional[str] = None) -> List[Dict[str, Any]]:
     try:
         if cluster is None:
             # Get topics from all clusters using resource
-            topics_json = await kafka_mcp_resources.get_topics_resource()
-            topics_data = json.loads(topics_json)
+            topics_data = await kafka_mcp_resources._get_topics_data()
 
             # Check for errors in resource response
             if "error" in topics_data:
                 raise ValueError(f"Error getting topics: {topics_data['error']}")
 
-            all_topics = []
-            for cluster_name, cluster_topics in topics_data.get("topics", {}).items():
-                if isinstance(cluster_topics, list):
-                    all_topics.extend(cluster_topics)
-                elif isinstance(cluster_topics, dict) and "error" in cluster_topics:
-                    logger.error(f"Error getting topics from cluster '{cluster_name}': {cluster_topics['error']}")
-                    continue
-
-            return sorted(all_topics, key=lambda x: (x.get("cluster", ""), x.get("name", "")))
+            all_topics = _merge_cluster_entries(topics_data.get("topics", {}), "topics")
+            all_topics.sort(key=lambda x: (x.get("cluster", ""), x.get("name", "")))
+            return all_topics
         else:
             # Get topics from specific cluster using cluster-specific resource
-            cluster_topics_json = await kafka_mcp_resources.get_cluster_topics_resource(cluster)
-            cluster_data = json.loads(cluster_topics_json)
+            cluster_data = await kafka_mcp_resources._get_cluster_topics_data(cluster)
 
             # Check for errors in resource response
             if "error" in cluster_data:
@@ -106,18 +118,15 @@ async def describe_topic(topic_name: str, cluster: Optional[str] = None) -> Dict
     try:
         admin_client = cluster_manager.get_admin_client(cluster)
 
-        # Run in executor to avoid blocking
-        loop = asyncio.get_event_loop()
-        metadata = await loop.run_in_executor(
-            cluster_manager.executor, lambda: admin_client.list_topics(topic=topic_name, timeout=10)
-        )
+        metadata = await _fetch_metadata(admin_client, topic_name)
 
         if topic_name not in metadata.topics:
             raise ValueError(f"Topic '{topic_name}' not found")
 
         topic_metadata = metadata.topics[topic_name]
 
-        # Get topic configurations
+        # Get topic configurations (run in executor to avoid blocking)
+        loop = asyncio.get_running_loop()
         config_resource = ConfigResource(ConfigResource.Type.TOPIC, topic_name)
         configs = await loop.run_in_executor(
             cluster_manager.executor,
@@ -161,26 +170,18 @@ async def list_consumer_groups(cluster: Optional[str] = None) -> List[Dict[str,
     try:
         if cluster is None:
             # Get consumer groups from all clusters using resource
-            groups_json = await kafka_mcp_resources.get_consumer_groups_resource()
-            groups_data = json.loads(groups_json)
+            groups_data = await kafka_mcp_resources._get_consumer_groups_data()
 
             # Check for errors in resource response
             if "error" in groups_data:
                 raise ValueError(f"Error getting consumer groups: {groups_data['error']}")
 
-            all_groups = []
-            for cluster_name, cluster_groups in groups_data.get("consumer_groups", {}).items():
-                if isinstance(cluster_groups, list):
-                    all_groups.extend(cluster_groups)
-                elif isinstance(cluster_groups, dict) and "error" in cluster_groups:
-                    logger.error(f"Error getting consumer groups from cluster '{cluster_name}': {cluster_groups['error']}")
-                    continue
-
-            return sorted(all_groups, key=lambda x: (x.get("cluster", ""), x.get("group_id", "")))
+            all_groups = _merge_cluster_entries(groups_data.get("consumer_groups", {}), "consumer groups")
+            all_groups.sort(key=lambda x: (x.get("cluster", ""), x.get("group_id", "")))
+            return all_groups
         else:
             # Get consumer groups from specific cluster using cluster-specific resource
-            cluster_groups_json = await kafka_mcp_resources.get_cluster_consumer_groups_resource(cluster)
-            cluster_data = json.loads(cluster_groups_json)
+            cluster_data = await kafka_mcp_resources._get_cluster_consumer_groups_data(cluster)
 
             # Check for errors in resource response
             if "error" in cluster_data:
@@ -200,7 +201,7 @@ async def describe_consumer_group(group_id: str, cluster: Optional[str] = None)
         admin_client = cluster_manager.get_admin_client(cluster)
 
         # Run in executor to avoid blocking
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
 
         # Describe the consumer group
         result = await loop.run_in_executor(
@@ -303,26 +304,18 @@ async def list_brokers(cluster: Optional[str] = None) -> List[Dict[str, Any]]:
     try:
         if cluster is None:
             # Get brokers from all clusters using resource
-            brokers_json = await kafka_mcp_resources.get_brokers_resource()
-            brokers_data = json.loads(brokers_json)
+            brokers_data = await kafka_mcp_resources._get_brokers_data()
 
             # Check for errors in resource response
             if "error" in brokers_data:
                 raise ValueError(f"Error getting brokers: {brokers_data['error']}")
 
-            all_brokers = []
-            for cluster_name, cluster_brokers in brokers_data.get("brokers", {}).items():
-                if isinstance(cluster_brokers, list):
-                    all_brokers.extend(cluster_brokers)
-                elif isinstance(cluster_brokers, dict) and "error" in cluster_brokers:
-                    logger.error(f"Error getting brokers from cluster '{cluster_name}': {cluster_brokers['error']}")
-                    continue
-
-            return sorted(all_brokers, key=lambda x: (x.get("cluster", ""), x.get("broker_id", 0)))
+            all_brokers = _merge_cluster_entries(brokers_data.get("brokers", {}), "brokers")
+            all_brokers.sort(key=lambda x: (x.get("cluster", ""), x.get("broker_id", 0)))
+            return all_brokers
         else:
             # Get brokers from specific cluster using cluster-specific resource
-            cluster_brokers_json = await kafka_mcp_resources.get_cluster_brokers_resource(cluster)
-            cluster_data = json.loads(cluster_brokers_json)
+            cluster_data = await kafka_mcp_resources._get_cluster_brokers_data(cluster)
 
             # Check for errors in resource response
             if "error" in cluster_data:
@@ -342,9 +335,7 @@ async def get_cluster_metadata(cluster: Optional[str] = None) -> Dict[str, Any]:
         admin_client = cluster_manager.get_admin_client(cluster)
         config = cluster_manager.get_cluster_config(cluster)
 
-        # Run in executor to avoid blocking
-        loop = asyncio.get_event_loop()
-        metadata = await loop.run_in_executor(cluster_manager.executor, lambda: admin_client.list_topics(timeout=10))
+        metadata = await _fetch_metadata(admin_client)
 
         # Count topics (excluding internal ones)
         user_topics = [name for name in metadata.topics.keys() if not name.startswith("__")]
@@ -383,8 +374,7 @@ async def get_partitions(cluster: Optional[str] = None, topic: Optional[str] = N
     try:
         if cluster:
             # Use cluster-specific resource
-            partitions_resource = await kafka_mcp_resources.get_cluster_partitions_resource(cluster)
-            partitions_data = json.loads(partitions_resource)
+            partitions_data = await kafka_mcp_resources._get_cluster_partitions_data(cluster, topic)
 
             if "error" in partitions_data:
                 raise ValueError(f"Failed to get partitions for cluster '{cluster}': {partitions_data['error']}")
@@ -392,20 +382,13 @@ async def get_partitions(cluster: Optional[str] = None, topic: Optional[str] = N
             all_partitions = partitions_data.get("partitions", [])
         else:
             # Use global resource
-            partitions_resource = await kafka_mcp_resources.get_partitions_resource()
-            partitions_data = json.loads(partitions_resource)
+            partitions_data = await kafka_mcp_resources._get_partitions_data(topic)
 
             # Check for errors in resource response
             if "error" in partitions_data:
                 raise ValueError(f"Error getting partitions: {partitions_data['error']}")
 
-            all_partitions = []
-            for cluster_name, cluster_partitions in partitions_data.get("partitions", {}).items():
-                if isinstance(cluster_partitions, list):
-                    all_partitions.extend(cluster_partitions)
-                elif isinstance(cluster_partitions, dict) and "error" in cluster_partitions:
-                    logger.error(f"Error getting partitions from cluster '{cluster_name}': {cluster_partitions['error']}")
-                    continue
+            all_partitions = _merge_cluster_entries(partitions_data.get("partitions", {}), "partitions")
 
         # Filter by topic if specified
         if topic:
@@ -421,8 +404,7 @@ async def get_partitions(cluster: Optional[str] = None, topic: Optional[str] = N
 async def get_cluster_health(cluster: str) -> Dict[str, Any]:
     """Get comprehensive health information for a specific cluster."""
     try:
-        health_resource = await kafka_mcp_resources.get_cluster_health_resource(cluster)
-        health_data = json.loads(health_resource)
+        health_data = await kafka_mcp_resources._get_cluster_health_data(cluster)
 
         if "error" in health_data:
             raise ValueError(f"Failed to get health for cluster '{cluster}': {health_data['error']}")
@@ -543,11 +525,7 @@ async def get_topic_partition_details(cluster_name: str, topic_name: str) -> Dic
     try:
         admin_client = cluster_manager.get_admin_client(cluster_name)
 
-        # Run in executor to avoid blocking
-        loop = asyncio.get_event_loop()
-        metadata = await loop.run_in_executor(
-            cluster_manager.executor, lambda: admin_client.list_topics(topic=topic_name, timeout=10)
-        )
+        metadata = await _fetch_metadata(admin_client, topic_name)
 
         if topic_name not in metadata.topics:
             raise ValueError(f"Topic '{topic_name}' not found in cluster '{cluster_name}'")
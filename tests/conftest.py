@@ -0,0 +1,149 @@
+"""
+Shared pytest configuration for the Kafka Brokers MCP test suite.
+"""
+
+import os
+import socket
+from dataclasses import replace
+
+import pytest
+
+from kafka_cluster_manager import KafkaClusterConfig, KafkaClusterManager, load_cluster_configurations
+import kafka_mcp_resources
+import kafka_mcp_tools
+from test_utils import FakeBroker, FakeMetadata, FakePartition, FakeTopic
+
+
+# Topic/partition layout shared (read-only) by every create_mock_metadata() result:
+# partition 0 is healthy, partition 1 is under-replicated.
+_TEMPLATE_PARTITIONS = {
+    0: FakePartition(leader=1, replicas=[1, 2, 3], isrs=[1, 2, 3]),
+    1: FakePartition(leader=2, replicas=[2, 1, 3], isrs=[2, 1]),
+}
+_TEMPLATE_BROKER_1 = FakeBroker(host="kafka-1", port=9092, rack="rack-1")
+_TEMPLATE_BROKER_2 = FakeBroker(host="kafka-2", port=9092, rack="rack-2")
+_TEMPLATE_METADATA = FakeMetadata(
+    cluster_id="kafka-cluster",
+    controller_id=1,
+    brokers={1: _TEMPLATE_BROKER_1, 2: _TEMPLATE_BROKER_2},
+    topics={name: FakeTopic(name=name, partitions=_TEMPLATE_PARTITIONS) for name in ("user-events", "order-updates")},
+)
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip tests marked integration unless KAFKA_INTEGRATION is set, before any probe runs."""
+    if os.getenv("KAFKA_INTEGRATION"):
+        return
+
+    skip_integration = pytest.mark.skip(reason="integration tests disabled (set KAFKA_INTEGRATION=1)")
+    for item in items:
+        if "integration" in item.keywords:
+            item.add_marker(skip_integration)
+
+
+def create_mock_metadata(cluster_name="production"):
+    """Create mock Kafka metadata for testing."""
+    return replace(
+        _TEMPLATE_METADATA,
+        cluster_id=f"kafka-cluster-{cluster_name}",
+        brokers={
+            1: replace(_TEMPLATE_BROKER_1, host=f"{cluster_name}-kafka-1"),
+            2: replace(_TEMPLATE_BROKER_2, host=f"{cluster_name}-kafka-2"),
+        },
+    )
+
+
+@pytest.fixture(autouse=True)
+def _fresh_metadata_cache():
+    """Start every test with an empty resource metadata cache."""
+    kafka_mcp_resources.clear_metadata_cache()
+
+
+@pytest.fixture(scope="session")
+def cluster_manager():
+    """KafkaClusterManager with development and production clusters, registered once per session.
+
+    Under pytest-xdist every worker is its own process and session, so each worker
+    builds and registers its own manager; the module-level globals are never shared.
+    """
+    manager = KafkaClusterManager()
+    manager.clusters = {
+        "development": KafkaClusterConfig(name="development", bootstrap_servers="localhost:9092"),
+        "production": KafkaClusterConfig(name="production", bootstrap_servers="localhost:9093"),
+    }
+
+    # Initialize cluster_manager in the server modules
+    kafka_mcp_tools.set_cluster_manager(manager)
+    kafka_mcp_resources.set_cluster_manager(manager)
+
+    yield manager
+    manager.close()
+
+
+@pytest.fixture(scope="session")
+def mock_metadata_prod():
+    """Mock metadata for the production cluster, built once per session."""
+    return create_mock_metadata("production")
+
+
+@pytest.fixture(scope="session")
+def kafka_manager():
+    """Cluster manager for the single-cluster integration environment, shared by the whole session.
+
+    Its AdminClient is created on first use and reused by every integration test.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
+        mp.setenv("KAFKA_SECURITY_PROTOCOL", "PLAINTEXT")
+        mp.setenv("VIEWONLY", "false")
+        manager = load_cluster_configurations()
+
+    yield manager
+    manager.close()
+
+
+def _port_open(port, host="localhost", timeout=1.0):
+    """Whether a TCP connection to host:port succeeds within timeout seconds."""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+@pytest.fixture(scope="session")
+def kafka_available():
+    """Whether the Kafka test broker accepts connections, probed once per session.
+
+    Set KAFKA_SKIP_DOCKER_PROBE to skip the probe and assume Kafka is up.
+    """
+    if os.getenv("KAFKA_SKIP_DOCKER_PROBE"):
+        return True
+
+    return _port_open(9092)
+
+
+@pytest.fixture(scope="session")
+def kafka_clusters_available():
+    """Whether both local Kafka clusters accept connections, probed once per session.
+
+    Set KAFKA_SKIP_DOCKER_PROBE to skip the probe and assume both clusters are up.
+    """
+    if os.getenv("KAFKA_SKIP_DOCKER_PROBE"):
+        return True
+
+    return _port_open(9092) and _port_open(9093)
+
+
+@pytest.fixture
+def require_kafka(kafka_available):
+    """Skip the requesting test unless the Kafka test environment is available."""
+    if not kafka_available:
+        pytest.skip("Kafka test environment not available")
+
+
+@pytest.fixture
+def require_kafka_clusters(kafka_clusters_available):
+    """Skip the requesting test unless the multi-cluster Kafka test environment is available."""
+    if not kafka_clusters_available:
+        pytest.skip("Multi-cluster test environment not available")
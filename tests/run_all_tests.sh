@@ -179,6 +179,9 @@ fi
 echo -e "${GREEN}✅ Test environment ready${NC}"
 echo ""
 
+# Enable the tests marked as integration now that Kafka is up
+export KAFKA_INTEGRATION=1
+
 # Check if pytest is available
 if ! command -v pytest &> /dev/null && ! python3 -m pytest --version &> /dev/null; then
     echo -e "${RED}❌ pytest not found. Installing...${NC}"
@@ -15,6 +15,7 @@ def setup_test_environment():
         'KAFKA_BOOTSTRAP_SERVERS': 'localhost:9092',
         'KAFKA_SECURITY_PROTOCOL': 'PLAINTEXT', 
         'VIEWONLY': 'false',
+        'KAFKA_TEST_PROFILE': '1',
         
         # Multi-cluster configuration for comprehensive tests
         'KAFKA_CLUSTER_NAME_1': 'dev',
@@ -5,26 +5,46 @@ Tests core functionality including cluster connection, topic listing, and consum
 """
 
 import asyncio
-import json
 import os
-import subprocess
-import sys
-import time
-import unittest
-from typing import Dict, List, Any
-from unittest.mock import patch, MagicMock
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import FrozenInstanceError
+from functools import partial
+from unittest.mock import MagicMock, patch
 
 import pytest
-
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from confluent_kafka.admin import NewTopic
 
 from kafka_cluster_manager import (
     KafkaClusterConfig, 
     KafkaClusterManager, 
     load_cluster_configurations
 )
-from test_utils import run_docker_compose
+from test_utils import await_topic, unique_name
+
+# Error patterns shared by the pytest.raises(match=...) checks below
+NO_CFG_RE = re.compile(r"No cluster configurations found")
+NONEXISTENT_RE = re.compile(r"Cluster 'nonexistent' not found")
+MULTI_RE = re.compile(r"Multiple clusters available")
+
+
+@pytest.fixture(scope="module")
+def empty_manager():
+    """Manager without any clusters, built once per module."""
+    manager = KafkaClusterManager()
+    yield manager
+    manager.close()
+
+
+@pytest.fixture(scope="module")
+def multi_manager():
+    """Manager with two clusters and no default, built once per module."""
+    manager = KafkaClusterManager()
+    manager.add_cluster(KafkaClusterConfig(name='cluster1', bootstrap_servers='localhost:9092'))
+    manager.add_cluster(KafkaClusterConfig(name='cluster2', bootstrap_servers='localhost:9093'))
+    yield manager
+    manager.close()
+
 
 class TestKafkaClusterManager:
     """Test the KafkaClusterManager class."""
@@ -81,10 +101,21 @@ class TestKafkaClusterManager:
             assert prod_config.sasl_username == 'prod-user'
             assert prod_config.viewonly is True
     
+    def test_explicit_env_config(self):
+        """Test that an explicit env mapping is used instead of the process environment."""
+        with patch.dict(os.environ, {'KAFKA_BOOTSTRAP_SERVERS': 'localhost:9092'}):
+            manager = load_cluster_configurations({
+                'KAFKA_CLUSTER_NAME_1': 'dev',
+                'KAFKA_BOOTSTRAP_SERVERS_1': 'localhost:9093',
+            })
+        
+        assert list(manager.clusters) == ['dev']
+        assert manager.get_cluster_config('dev').bootstrap_servers == 'localhost:9093'
+    
     def test_no_config_raises_error(self):
         """Test that missing configuration raises appropriate error."""
         with patch.dict(os.environ, {}, clear=True):
-            with pytest.raises(ValueError, match="No cluster configurations found"):
+            with pytest.raises(ValueError, match=NO_CFG_RE):
                 load_cluster_configurations()
     
     def test_viewonly_check(self):
@@ -99,53 +130,91 @@ class TestKafkaClusterManager:
         
         assert manager.is_viewonly('test') is True
 
+    def test_admin_client_shared_across_managers(self):
+        """Test that configs pointing at the same brokers share one AdminClient."""
+        manager1 = KafkaClusterManager()
+        manager1.add_cluster(KafkaClusterConfig(name='one', bootstrap_servers='localhost:9092'))
+        manager2 = KafkaClusterManager()
+        manager2.add_cluster(KafkaClusterConfig(name='two', bootstrap_servers='localhost:9092', viewonly=True))
+        manager2.add_cluster(KafkaClusterConfig(name='other', bootstrap_servers='localhost:9093'))
+
+        assert manager1.get_admin_client('one') is manager2.get_admin_client('two')
+        assert manager2.get_admin_client('two') is not manager2.get_admin_client('other')
+
+    def test_cluster_config_is_immutable(self):
+        """Test that cluster configs cannot be changed after loading."""
+        config = KafkaClusterConfig(name='frozen', bootstrap_servers='localhost:9092')
+
+        with pytest.raises(FrozenInstanceError):
+            config.viewonly = True
+        assert not hasattr(config, '__dict__')
+
+    def test_admin_client_created_on_first_use(self):
+        """Test that AdminClients are created lazily and cached per cluster."""
+        manager = KafkaClusterManager()
+        manager.add_cluster(KafkaClusterConfig(name='lazy', bootstrap_servers='localhost:9092'))
+        assert manager.admin_clients == {}
+
+        admin_client = manager.get_admin_client('lazy')
+        assert manager.get_admin_client() is admin_client
+        assert manager.admin_clients == {'lazy': admin_client}
+
+        manager.close()
+        assert manager.admin_clients == {}
+
+    def test_admin_client_created_once_under_concurrency(self):
+        """Test that concurrent first calls for a cluster build a single AdminClient."""
+        manager = KafkaClusterManager()
+        manager.add_cluster(KafkaClusterConfig(name='pooled', bootstrap_servers='pooled:9092'))
+
+        with patch('kafka_cluster_manager.AdminClient', side_effect=lambda conf: MagicMock()) as mock_admin_client:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                clients = list(pool.map(lambda _: manager.get_admin_client('pooled'), range(32)))
+
+        assert mock_admin_client.call_count == 1
+        assert all(client is clients[0] for client in clients)
+        manager.close()
+
+    def test_admin_config_disables_topic_auto_creation(self):
+        """Test that metadata lookups for a missing topic cannot auto-create it."""
+        config = KafkaClusterConfig(name='test', bootstrap_servers='localhost:9092', viewonly=True)
+        
+        kafka_config = KafkaClusterManager()._build_kafka_config(config)
+        assert kafka_config['allow.auto.create.topics'] == 'false'
+
+    def test_test_profile_config(self):
+        """Test that the test profile refreshes metadata less often than the librdkafka defaults."""
+        config = KafkaClusterConfig(name='test', bootstrap_servers='localhost:9092')
+
+        kafka_config = KafkaClusterManager(test_mode=True)._build_kafka_config(config)
+        assert int(kafka_config['metadata.max.age.ms']) > 900000
+        assert int(kafka_config['topic.metadata.refresh.interval.ms']) > 300000
+
+        kafka_config = KafkaClusterManager(test_mode=False)._build_kafka_config(config)
+        assert 'metadata.max.age.ms' not in kafka_config
+
+
+@pytest.mark.integration
+@pytest.mark.usefixtures("require_kafka")
 class TestMCPServerIntegration:
     """Integration tests with actual Kafka clusters."""
     
-    @classmethod
-    def setup_class(cls):
-        """Set up test environment."""
-        # Check if Kafka is available
-        try:
-            result = run_docker_compose([
-                '-f', 'docker-compose.test.yml', 
-                'exec', '-T', 'kafka', 
-                'kafka-topics', '--bootstrap-server', 'localhost:9092', '--list'
-            ], capture_output=True, text=True, timeout=10)
-            
-            if result.returncode != 0:
-                pytest.skip("Kafka test environment not available")
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            pytest.skip("Docker or Kafka not available for integration tests")
-    
-    def setup_method(self):
-        """Set up for each test method."""
-        # Configure environment for single cluster
-        self.env_patch = patch.dict(os.environ, {
-            'KAFKA_BOOTSTRAP_SERVERS': 'localhost:9092',
-            'KAFKA_SECURITY_PROTOCOL': 'PLAINTEXT',
-            'VIEWONLY': 'false'
-        })
-        self.env_patch.start()
-        
-        # Load cluster manager
-        self.manager = load_cluster_configurations()
-    
-    def teardown_method(self):
-        """Clean up after each test method."""
-        self.env_patch.stop()
-        self.manager.executor.shutdown(wait=True)
+    @pytest.fixture(scope="class", autouse=True)
+    def _manager(self, request, kafka_manager):
+        """Share the session's single-cluster manager and its AdminClient with the class."""
+        request.cls.manager = kafka_manager
+        request.cls.admin_client = kafka_manager.get_admin_client()
     
     @pytest.mark.asyncio
     async def test_list_topics_integration(self):
         """Test listing topics with real Kafka cluster."""
-        admin_client = self.manager.get_admin_client()
+        admin_client = self.admin_client
         
         # Get topics using admin client directly
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         metadata = await loop.run_in_executor(
             self.manager.executor,
-            lambda: admin_client.list_topics(timeout=10)
+            partial(admin_client.list_topics, timeout=10)
         )
         
         # Should have at least the test topics we created
@@ -158,52 +227,36 @@ class TestMCPServerIntegration:
     @pytest.mark.asyncio
     async def test_describe_topic_integration(self):
         """Test describing a topic with real Kafka cluster."""
-        admin_client = self.manager.get_admin_client()
+        admin_client = self.admin_client
         
         # Create a test topic first
-        from confluent_kafka.admin import NewTopic
-        topic_name = "test-describe-topic"
+        topic_name = unique_name("test-describe-topic")
         
         new_topic = NewTopic(topic_name, num_partitions=3, replication_factor=1)
         
-        loop = asyncio.get_event_loop()
-        
-        # Create topic
-        create_result = await loop.run_in_executor(
-            self.manager.executor,
-            lambda: admin_client.create_topics([new_topic], request_timeout=10)
-        )
-        
-        # Wait for topic creation
-        await asyncio.sleep(2)
+        # Create topic; create_topics() only submits the request, so await its futures
+        futures = admin_client.create_topics([new_topic], request_timeout=10)
+        await asyncio.gather(*(asyncio.wrap_future(f) for f in futures.values()))
         
         try:
-            # Describe the topic
-            metadata = await loop.run_in_executor(
-                self.manager.executor,
-                lambda: admin_client.list_topics(topic=topic_name, timeout=10)
-            )
-            
-            assert topic_name in metadata.topics
-            topic_metadata = metadata.topics[topic_name]
+            # Describe the topic as soon as its partitions have leaders
+            topic_metadata = await await_topic(admin_client, self.manager.executor, topic_name)
             assert len(topic_metadata.partitions) == 3
             
         finally:
-            # Clean up - delete the test topic
-            delete_result = await loop.run_in_executor(
-                self.manager.executor,
-                lambda: admin_client.delete_topics([topic_name], request_timeout=10)
-            )
+            # Clean up - delete the test topic and wait for the broker to acknowledge
+            futures = admin_client.delete_topics([topic_name], request_timeout=10)
+            await asyncio.gather(*(asyncio.wrap_future(f) for f in futures.values()))
     
     @pytest.mark.asyncio
     async def test_list_consumer_groups_integration(self):
         """Test listing consumer groups with real Kafka cluster."""
-        admin_client = self.manager.get_admin_client()
+        admin_client = self.admin_client
         
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         result = await loop.run_in_executor(
             self.manager.executor,
-            lambda: admin_client.list_consumer_groups(timeout=10)
+            partial(admin_client.list_consumer_groups, timeout=10)
         )
         
         groups = result.result()
@@ -213,12 +266,12 @@ class TestMCPServerIntegration:
     @pytest.mark.asyncio
     async def test_list_brokers_integration(self):
         """Test listing brokers with real Kafka cluster."""
-        admin_client = self.manager.get_admin_client()
+        admin_client = self.admin_client
         
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         metadata = await loop.run_in_executor(
             self.manager.executor,
-            lambda: admin_client.list_topics(timeout=10)
+            partial(admin_client.list_topics, timeout=10)
         )
         
         brokers = metadata.brokers
@@ -233,13 +286,13 @@ class TestMCPServerIntegration:
     @pytest.mark.asyncio
     async def test_cluster_metadata_integration(self):
         """Test getting cluster metadata with real Kafka cluster."""
-        admin_client = self.manager.get_admin_client()
+        admin_client = self.admin_client
         config = self.manager.get_cluster_config()
         
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         metadata = await loop.run_in_executor(
             self.manager.executor,
-            lambda: admin_client.list_topics(timeout=10)
+            partial(admin_client.list_topics, timeout=10)
         )
         
         # Verify metadata structure
@@ -253,6 +306,7 @@ class TestMCPServerIntegration:
         assert config.bootstrap_servers == 'localhost:9092'
         assert config.security_protocol == 'PLAINTEXT'
 
+
 class TestViewonlyMode:
     """Test viewonly mode functionality."""
     
@@ -290,37 +344,24 @@ class TestViewonlyMode:
         assert manager.is_viewonly('dev') is False
         assert manager.is_viewonly('prod') is True
 
+
 class TestErrorHandling:
     """Test error handling scenarios."""
     
-    def test_invalid_cluster_name(self):
-        """Test handling of invalid cluster names."""
-        manager = KafkaClusterManager()
-        config = KafkaClusterConfig(name='test', bootstrap_servers='localhost:9092')
-        manager.add_cluster(config)
-        
-        with pytest.raises(ValueError, match="Cluster 'nonexistent' not found"):
-            manager.get_cluster_config('nonexistent')
-    
-    def test_no_clusters_configured(self):
-        """Test behavior when no clusters are configured."""
-        manager = KafkaClusterManager()
-        
-        with pytest.raises(ValueError, match="Multiple clusters available"):
-            manager.get_cluster_config()
-    
-    def test_multiple_clusters_no_default(self):
-        """Test behavior with multiple clusters but no default specified."""
-        manager = KafkaClusterManager()
-        
-        config1 = KafkaClusterConfig(name='cluster1', bootstrap_servers='localhost:9092')
-        config2 = KafkaClusterConfig(name='cluster2', bootstrap_servers='localhost:9093')
-        
-        manager.add_cluster(config1)
-        manager.add_cluster(config2)
-        
-        with pytest.raises(ValueError, match="Multiple clusters available"):
-            manager.get_cluster_config()
+    @pytest.mark.parametrize("manager_fixture,action,pattern", [
+        # Invalid cluster name
+        ("multi_manager", lambda m: m.get_cluster_config('nonexistent'), NONEXISTENT_RE),
+        # No clusters configured
+        ("empty_manager", lambda m: m.get_cluster_config(), MULTI_RE),
+        # Multiple clusters but no default specified
+        ("multi_manager", lambda m: m.get_cluster_config(), MULTI_RE),
+    ], ids=["invalid_cluster_name", "no_clusters_configured", "multiple_clusters_no_default"])
+    def test_error_paths(self, request, manager_fixture, action, pattern):
+        """Test that bad cluster lookups raise the expected errors."""
+        manager = request.getfixturevalue(manager_fixture)
+        with pytest.raises(ValueError, match=pattern):
+            action(manager)
+
 
 if __name__ == "__main__":
     # Run basic tests
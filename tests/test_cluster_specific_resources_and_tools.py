@@ -4,28 +4,16 @@ Tests for cluster-specific MCP resources and advanced tools
 Tests the cluster-specific kafka://{name} resources and advanced analysis tools.
 """
 
-import asyncio
 import json
-import os
-import sys
-import unittest
-from unittest.mock import patch, MagicMock, AsyncMock
-from typing import Dict, List, Any
+import re
+from types import MappingProxyType, SimpleNamespace
+from unittest.mock import patch, AsyncMock, MagicMock
 
 import pytest
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
-from kafka_cluster_manager import (
-    KafkaClusterConfig,
-    KafkaClusterManager
-)
 from kafka_mcp_resources import (
     get_cluster_brokers_resource,
     get_cluster_topics_resource,
-    get_cluster_consumer_groups_resource,
-    get_cluster_partitions_resource,
     get_cluster_health_resource
 )
 from kafka_mcp_tools import (
@@ -41,81 +29,114 @@ from kafka_mcp_tools import (
 )
 import kafka_mcp_tools
 import kafka_mcp_resources
+from test_utils import FakeMetadata, FakePartition, FakeTopic
+
+
+_BROKERS_ERROR_RE = re.compile(r"Failed to get brokers for cluster 'production'")
+
+# Payloads returned by the patched resource data helpers
+_PROD_BROKERS = {
+    "cluster": "production",
+    "brokers": [
+        {"broker_id": 1, "host": "prod-kafka-1", "port": 9092, "cluster": "production"}
+    ]
+}
+_PROD_TOPICS = {
+    "cluster": "production",
+    "topics": [
+        {"name": "user-events", "partitions": 6, "cluster": "production"}
+    ]
+}
+_PROD_PARTITIONS = {
+    "cluster": "production",
+    "partitions": [
+        {"topic": "user-events", "partition_id": 0, "cluster": "production"},
+        {"topic": "user-events", "partition_id": 1, "cluster": "production"},
+        {"topic": "order-updates", "partition_id": 0, "cluster": "production"}
+    ]
+}
+_PROD_HEALTH = {
+    "cluster": "production",
+    "health_status": "healthy",
+    "metrics": {
+        "broker_count": 3,
+        "topic_count": 15,
+        "partition_count": 120,
+        "unhealthy_partitions": 0,
+        "health_percentage": 100.0
+    }
+}
+_PROD_BROKERS_ERROR = {
+    "cluster": "production",
+    "error": "Connection failed",
+    "status": "failed"
+}
+
+
+# Read-only partition lists returned by the patched get_partitions tool
+_LEADER_PARTITIONS = tuple(MappingProxyType(p) for p in [
+    {"topic": "user-events", "partition_id": 0, "leader": 1},
+    {"topic": "user-events", "partition_id": 1, "leader": 1},
+    {"topic": "user-events", "partition_id": 2, "leader": 2},
+    {"topic": "order-updates", "partition_id": 0, "leader": 2}
+])
+_UNDER_REP_PARTITIONS = tuple(MappingProxyType(p) for p in [
+    {
+        "topic": "user-events",
+        "partition_id": 0,
+        "leader": 1,
+        "replicas": [1, 2, 3],
+        "in_sync_replicas": [1, 2, 3]  # Healthy
+    },
+    {
+        "topic": "user-events", 
+        "partition_id": 1,
+        "leader": 1,
+        "replicas": [1, 2, 3],
+        "in_sync_replicas": [1, 2]  # Under-replicated
+    },
+    {
+        "topic": "order-updates",
+        "partition_id": 0,
+        "leader": 1,
+        "replicas": [1, 2],
+        "in_sync_replicas": [1]  # Under-replicated
+    }
+])
+_BROKER_COUNT_PARTITIONS = tuple(MappingProxyType(p) for p in [
+    {"topic": "user-events", "leader": 1, "replicas": [1, 2]},
+    {"topic": "user-events", "leader": 2, "replicas": [2, 1]},
+    {"topic": "order-updates", "leader": 1, "replicas": [1, 2]}
+])
+
+
+@pytest.fixture(scope="module")
+def mock_admin_client(mock_metadata_prod):
+    """Admin client mock serving the production metadata, shared by this module."""
+    admin_client = MagicMock()
+    admin_client.list_topics.return_value = mock_metadata_prod
+    return admin_client
+
+
+@pytest.fixture(scope="module")
+def mock_config():
+    """Production cluster config mock for the health resource."""
+    config = MagicMock()
+    config.bootstrap_servers = "prod-kafka:9092"
+    config.viewonly = True
+    return config
 
 
 class TestClusterSpecificResources:
     """Test cluster-specific MCP resources."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.manager = KafkaClusterManager()
-        
-        # Initialize cluster_manager in the imported modules
-        kafka_mcp_tools.set_cluster_manager(self.manager)
-        kafka_mcp_resources.set_cluster_manager(self.manager)
-        
-        # Add test cluster
-        cluster_config = KafkaClusterConfig(
-            name="production",
-            bootstrap_servers="localhost:9092"
-        )
-        self.manager.clusters = {
-            "production": cluster_config
-        }
-
-    def create_mock_metadata(self, cluster_name="production"):
-        """Create mock Kafka metadata for testing."""
-        mock_metadata = MagicMock()
-        mock_metadata.cluster_id = f"kafka-cluster-{cluster_name}"
-        mock_metadata.controller_id = 1
-        
-        # Mock brokers
-        mock_broker = MagicMock()
-        mock_broker.host = f"{cluster_name}-kafka-1"
-        mock_broker.port = 9092
-        mock_broker.rack = "rack-1"
-        mock_metadata.brokers = {1: mock_broker, 2: MagicMock(host=f"{cluster_name}-kafka-2", port=9092, rack="rack-2")}
-        
-        # Mock topics with partitions
-        mock_topic = MagicMock()
-        mock_partition1 = MagicMock()
-        mock_partition1.leader = 1
-        mock_partition1.replicas = [1, 2, 3]
-        mock_partition1.isrs = [1, 2, 3]
-        mock_partition1.error = None
-        
-        mock_partition2 = MagicMock()
-        mock_partition2.leader = 2
-        mock_partition2.replicas = [2, 1, 3]
-        mock_partition2.isrs = [2, 1]  # Under-replicated
-        mock_partition2.error = None
-        
-        mock_topic.partitions = {0: mock_partition1, 1: mock_partition2}
-        mock_metadata.topics = {"user-events": mock_topic, "order-updates": mock_topic}
-        
-        return mock_metadata
-
-    def create_mock_consumer_groups(self):
-        """Create mock consumer groups for testing."""
-        mock_group = MagicMock()
-        mock_group.group_id = "analytics-service"
-        mock_group.is_simple_consumer_group = False
-        mock_group.state = MagicMock()
-        mock_group.state.name = "STABLE"
-        
-        mock_result = MagicMock()
-        mock_result.result.return_value = [mock_group]
-        
-        return mock_result
-
-    @patch('kafka_mcp_resources.cluster_manager')
     @pytest.mark.asyncio
-    async def test_get_cluster_brokers_resource(self, mock_cluster_manager):
+    async def test_get_cluster_brokers_resource(self, monkeypatch, cluster_manager, mock_admin_client):
         """Test kafka://brokers/{name} resource."""
-        # Mock admin client
-        mock_admin_client = MagicMock()
-        mock_admin_client.list_topics.return_value = self.create_mock_metadata("production")
-        mock_cluster_manager.get_admin_client.return_value = mock_admin_client
+        monkeypatch.setattr(kafka_mcp_resources, "cluster_manager", SimpleNamespace(
+            get_admin_client=lambda name: mock_admin_client,
+            executor=cluster_manager.executor,
+        ))
         
         result_json = await get_cluster_brokers_resource("production")
         result = json.loads(result_json)
@@ -136,14 +157,13 @@ class TestClusterSpecificResources:
         assert "cluster" in broker
         assert broker["cluster"] == "production"
 
-    @patch('kafka_mcp_resources.cluster_manager')
     @pytest.mark.asyncio
-    async def test_get_cluster_topics_resource(self, mock_cluster_manager):
+    async def test_get_cluster_topics_resource(self, monkeypatch, cluster_manager, mock_admin_client):
         """Test kafka://topics/{name} resource."""
-        # Mock admin client
-        mock_admin_client = MagicMock()
-        mock_admin_client.list_topics.return_value = self.create_mock_metadata("production")
-        mock_cluster_manager.get_admin_client.return_value = mock_admin_client
+        monkeypatch.setattr(kafka_mcp_resources, "cluster_manager", SimpleNamespace(
+            get_admin_client=lambda name: mock_admin_client,
+            executor=cluster_manager.executor,
+        ))
         
         result_json = await get_cluster_topics_resource("production")
         result = json.loads(result_json)
@@ -163,19 +183,14 @@ class TestClusterSpecificResources:
         assert "cluster" in topic
         assert topic["cluster"] == "production"
 
-    @patch('kafka_mcp_resources.cluster_manager')
     @pytest.mark.asyncio
-    async def test_get_cluster_health_resource(self, mock_cluster_manager):
+    async def test_get_cluster_health_resource(self, monkeypatch, cluster_manager, mock_admin_client, mock_config):
         """Test kafka://cluster-health/{name} resource."""
-        # Mock admin client and config
-        mock_admin_client = MagicMock()
-        mock_admin_client.list_topics.return_value = self.create_mock_metadata("production")
-        mock_cluster_manager.get_admin_client.return_value = mock_admin_client
-        
-        mock_config = MagicMock()
-        mock_config.bootstrap_servers = "prod-kafka:9092"
-        mock_config.viewonly = True
-        mock_cluster_manager.get_cluster_config.return_value = mock_config
+        monkeypatch.setattr(kafka_mcp_resources, "cluster_manager", SimpleNamespace(
+            get_admin_client=lambda name: mock_admin_client,
+            get_cluster_config=lambda name: mock_config,
+            executor=cluster_manager.executor,
+        ))
         
         result_json = await get_cluster_health_resource("production")
         result = json.loads(result_json)
@@ -194,14 +209,17 @@ class TestClusterSpecificResources:
         assert "partition_count" in result["metrics"]
         assert "health_percentage" in result["metrics"]
 
-    @patch('kafka_mcp_resources.cluster_manager')
     @pytest.mark.asyncio
-    async def test_cluster_resource_error_handling(self, mock_cluster_manager):
+    async def test_cluster_resource_error_handling(self, monkeypatch, cluster_manager):
         """Test error handling in cluster-specific resources."""
         # Mock cluster manager with error
-        mock_admin_client = MagicMock()
-        mock_admin_client.list_topics.side_effect = Exception("Connection failed")
-        mock_cluster_manager.get_admin_client.return_value = mock_admin_client
+        def failing_admin_client(name):
+            raise Exception("Connection failed")
+        
+        monkeypatch.setattr(kafka_mcp_resources, "cluster_manager", SimpleNamespace(
+            get_admin_client=failing_admin_client,
+            executor=cluster_manager.executor,
+        ))
         
         result_json = await get_cluster_brokers_resource("production")
         result = json.loads(result_json)
@@ -214,36 +232,15 @@ class TestClusterSpecificResources:
         assert result["status"] == "failed"
 
 
+@pytest.mark.usefixtures("cluster_manager")
 class TestClusterSpecificTools:
     """Test cluster-specific tools."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.manager = KafkaClusterManager()
-        
-        # Initialize cluster_manager in the imported modules
-        kafka_mcp_tools.set_cluster_manager(self.manager)
-        kafka_mcp_resources.set_cluster_manager(self.manager)
-        
-        # Add test cluster
-        cluster_config = KafkaClusterConfig(
-            name="production",
-            bootstrap_servers="localhost:9092"
-        )
-        self.manager.clusters = {
-            "production": cluster_config
-        }
-
-    @patch('kafka_mcp_resources.get_cluster_brokers_resource')
+    @patch('kafka_mcp_resources._get_cluster_brokers_data')
     @pytest.mark.asyncio
     async def test_get_brokers_tool_with_cluster(self, mock_resource):
         """Test get_brokers tool with cluster parameter."""
-        mock_resource.return_value = json.dumps({
-            "cluster": "production",
-            "brokers": [
-                {"broker_id": 1, "host": "prod-kafka-1", "port": 9092, "cluster": "production"}
-            ]
-        })
+        mock_resource.return_value = _PROD_BROKERS
         
         result = await list_brokers(cluster="production")
         
@@ -251,16 +248,11 @@ class TestClusterSpecificTools:
         assert result[0]["cluster"] == "production"
         assert result[0]["broker_id"] == 1
 
-    @patch('kafka_mcp_resources.get_cluster_topics_resource')
+    @patch('kafka_mcp_resources._get_cluster_topics_data')
     @pytest.mark.asyncio
     async def test_get_topics_tool_with_cluster(self, mock_resource):
         """Test get_topics tool with cluster parameter."""
-        mock_resource.return_value = json.dumps({
-            "cluster": "production",
-            "topics": [
-                {"name": "user-events", "partitions": 6, "cluster": "production"}
-            ]
-        })
+        mock_resource.return_value = _PROD_TOPICS
         
         result = await list_topics(cluster="production")
         
@@ -268,18 +260,11 @@ class TestClusterSpecificTools:
         assert result[0]["name"] == "user-events"
         assert result[0]["cluster"] == "production"
 
-    @patch('kafka_mcp_resources.get_cluster_partitions_resource')
+    @patch('kafka_mcp_resources._get_cluster_partitions_data')
     @pytest.mark.asyncio
     async def test_get_cluster_partitions_with_topic_filter(self, mock_resource):
         """Test get_cluster_partitions tool with topic filter."""
-        mock_resource.return_value = json.dumps({
-            "cluster": "production",
-            "partitions": [
-                {"topic": "user-events", "partition_id": 0, "cluster": "production"},
-                {"topic": "user-events", "partition_id": 1, "cluster": "production"},
-                {"topic": "order-updates", "partition_id": 0, "cluster": "production"}
-            ]
-        })
+        mock_resource.return_value = _PROD_PARTITIONS
         
         result = await get_partitions(cluster="production", topic="user-events")
         
@@ -288,66 +273,31 @@ class TestClusterSpecificTools:
         for partition in result:
             assert partition["topic"] == "user-events"
 
-    @patch('kafka_mcp_resources.get_cluster_health_resource')
+    @patch('kafka_mcp_resources._get_cluster_health_data')
     @pytest.mark.asyncio
     async def test_get_cluster_health_tool(self, mock_resource):
         """Test get_cluster_health tool."""
-        mock_resource.return_value = json.dumps({
-            "cluster": "production",
-            "health_status": "healthy",
-            "metrics": {
-                "broker_count": 3,
-                "topic_count": 15,
-                "partition_count": 120,
-                "unhealthy_partitions": 0,
-                "health_percentage": 100.0
-            }
-        })
+        mock_resource.return_value = _PROD_HEALTH
         
         result = await get_cluster_health("production")
         
         assert result["health_status"] == "healthy"
         assert result["metrics"]["health_percentage"] == 100.0
 
-    @patch('kafka_brokers_unified_mcp.get_cluster_brokers_resource')
+    @patch('kafka_mcp_resources._get_cluster_brokers_data')
     @pytest.mark.asyncio
     async def test_cluster_tool_error_handling(self, mock_resource):
         """Test error handling in cluster tools."""
-        mock_resource.return_value = json.dumps({
-            "cluster": "production",
-            "error": "Connection failed",
-            "status": "failed"
-        })
+        mock_resource.return_value = _PROD_BROKERS_ERROR
         
-        with pytest.raises(ValueError, match="Failed to get brokers for cluster 'production'"):
+        with pytest.raises(ValueError, match=_BROKERS_ERROR_RE):
             await list_brokers(cluster="production")
 
 
+@pytest.mark.usefixtures("cluster_manager")
 class TestAdvancedAnalysisTools:
     """Test advanced analysis and monitoring tools."""
 
-    def setup_method(self):
-        """Set up test fixtures.""" 
-        self.manager = KafkaClusterManager()
-        
-        # Initialize cluster_manager in the imported modules
-        kafka_mcp_tools.set_cluster_manager(self.manager)
-        kafka_mcp_resources.set_cluster_manager(self.manager)
-        
-        # Add test clusters
-        dev_config = KafkaClusterConfig(
-            name="development",
-            bootstrap_servers="localhost:9092"
-        )
-        prod_config = KafkaClusterConfig(
-            name="production",
-            bootstrap_servers="localhost:9093"
-        )
-        self.manager.clusters = {
-            "development": dev_config,
-            "production": prod_config
-        }
-
     @patch('kafka_mcp_tools.list_topics')
     @pytest.mark.asyncio
     async def test_compare_cluster_topics(self, mock_get_topics):
@@ -399,12 +349,7 @@ class TestAdvancedAnalysisTools:
             {"broker_id": 2, "host": "kafka-2", "port": 9092}
         ]
         
-        mock_partitions.return_value = [
-            {"topic": "user-events", "partition_id": 0, "leader": 1},
-            {"topic": "user-events", "partition_id": 1, "leader": 1},
-            {"topic": "user-events", "partition_id": 2, "leader": 2},
-            {"topic": "order-updates", "partition_id": 0, "leader": 2}
-        ]
+        mock_partitions.return_value = _LEADER_PARTITIONS
         
         result = await get_partition_leaders("production")
         
@@ -419,37 +364,16 @@ class TestAdvancedAnalysisTools:
         leader_dist = result["leader_distribution"]
         assert len(leader_dist) == 2
         
-        # Check broker 1 has 2 partitions as leader
-        broker1_info = next(b for b in leader_dist if b["broker_id"] == 1)
-        assert broker1_info["partition_count"] == 2
+        # Each broker leads 2 partitions
+        leaders_by_id = {b["broker_id"]: b for b in leader_dist}
+        assert leaders_by_id[1]["partition_count"] == 2
+        assert leaders_by_id[2]["partition_count"] == 2
 
     @patch('kafka_mcp_tools.get_partitions')
     @pytest.mark.asyncio
     async def test_find_under_replicated_partitions(self, mock_partitions):
         """Test find_under_replicated_partitions tool."""
-        mock_partitions.return_value = [
-            {
-                "topic": "user-events",
-                "partition_id": 0,
-                "leader": 1,
-                "replicas": [1, 2, 3],
-                "in_sync_replicas": [1, 2, 3]  # Healthy
-            },
-            {
-                "topic": "user-events", 
-                "partition_id": 1,
-                "leader": 1,
-                "replicas": [1, 2, 3],
-                "in_sync_replicas": [1, 2]  # Under-replicated
-            },
-            {
-                "topic": "order-updates",
-                "partition_id": 0,
-                "leader": 1,
-                "replicas": [1, 2],
-                "in_sync_replicas": [1]  # Under-replicated
-            }
-        ]
+        mock_partitions.return_value = _UNDER_REP_PARTITIONS
         
         result = await find_under_replicated_partitions("production")
         
@@ -467,56 +391,38 @@ class TestAdvancedAnalysisTools:
         # Verify calculations
         assert under_rep["missing_replicas"] > 0
 
+    @patch('kafka_mcp_tools.list_brokers')
     @patch('kafka_mcp_tools.cluster_manager')
     @pytest.mark.asyncio
-    async def test_get_topic_partition_details(self, mock_cluster_manager):
+    async def test_get_topic_partition_details(self, mock_cluster_manager, mock_brokers, monkeypatch):
         """Test get_topic_partition_details tool."""
-        # Mock admin client
-        mock_admin_client = MagicMock()
-        
         # Mock metadata for specific topic
-        mock_metadata = MagicMock()
-        mock_topic = MagicMock()
-        
-        mock_partition = MagicMock()
-        mock_partition.leader = 1
-        mock_partition.replicas = [1, 2, 3]
-        mock_partition.isrs = [1, 2, 3]
-        mock_partition.error = None
-        
-        mock_topic.partitions = {0: mock_partition}
-        mock_metadata.topics = {"user-events": mock_topic}
-        
-        mock_cluster_manager.get_admin_client.return_value = mock_admin_client
-        mock_cluster_manager.executor = MagicMock()
-        
-        # Mock the list_brokers call
-        with patch('kafka_mcp_tools.list_brokers') as mock_brokers:
-            mock_brokers.return_value = [
-                {"broker_id": 1, "host": "kafka-1", "port": 9092},
-                {"broker_id": 2, "host": "kafka-2", "port": 9092},
-                {"broker_id": 3, "host": "kafka-3", "port": 9092}
-            ]
-            
-            # Mock the executor.run_in_executor call
-            async def mock_run_in_executor(executor, func):
-                return mock_metadata
-            
-            with patch('asyncio.get_event_loop') as mock_loop:
-                mock_loop.return_value.run_in_executor = mock_run_in_executor
-                
-                result = await get_topic_partition_details("production", "user-events")
-                
-                # Verify structure
-                assert "cluster" in result
-                assert "topic" in result
-                assert "partition_count" in result
-                assert "health" in result
-                assert "partitions" in result
-                
-                # Verify health calculation
-                assert result["health"]["healthy_partitions"] == 1
-                assert result["health"]["health_percentage"] == 100.0
+        partition = FakePartition(leader=1, replicas=[1, 2, 3], isrs=[1, 2, 3])
+        metadata = FakeMetadata(
+            cluster_id="kafka-cluster-production",
+            controller_id=1,
+            topics={"user-events": FakeTopic(name="user-events", partitions={0: partition})},
+        )
+        monkeypatch.setattr(kafka_mcp_tools, "_fetch_metadata", AsyncMock(return_value=metadata))
+        
+        mock_brokers.return_value = [
+            {"broker_id": 1, "host": "kafka-1", "port": 9092},
+            {"broker_id": 2, "host": "kafka-2", "port": 9092},
+            {"broker_id": 3, "host": "kafka-3", "port": 9092}
+        ]
+        
+        result = await get_topic_partition_details("production", "user-events")
+        
+        # Verify structure
+        assert "cluster" in result
+        assert "topic" in result
+        assert "partition_count" in result
+        assert "health" in result
+        assert "partitions" in result
+        
+        # Verify health calculation
+        assert result["health"]["healthy_partitions"] == 1
+        assert result["health"]["health_percentage"] == 100.0
 
     @patch('kafka_mcp_tools.get_partitions')
     @patch('kafka_mcp_tools.list_brokers')
@@ -528,11 +434,7 @@ class TestAdvancedAnalysisTools:
             {"broker_id": 2, "host": "kafka-2", "port": 9092, "rack": "rack-2"}
         ]
         
-        mock_partitions.return_value = [
-            {"topic": "user-events", "leader": 1, "replicas": [1, 2]},
-            {"topic": "user-events", "leader": 2, "replicas": [2, 1]},
-            {"topic": "order-updates", "leader": 1, "replicas": [1, 2]}
-        ]
+        mock_partitions.return_value = _BROKER_COUNT_PARTITIONS
         
         result = await get_broker_partition_count("production")
         
@@ -548,9 +450,9 @@ class TestAdvancedAnalysisTools:
         assert "topic_count" in broker_stats
         
         # Verify counts (broker 1 should have 2 leader partitions)
-        broker1_stats = next(b for b in result if b["broker_id"] == 1)
-        assert broker1_stats["leader_count"] == 2
-        assert broker1_stats["replica_count"] == 3  # 3 total replica assignments
+        stats_by_id = {b["broker_id"]: b for b in result}
+        assert stats_by_id[1]["leader_count"] == 2
+        assert stats_by_id[1]["replica_count"] == 3  # 3 total replica assignments
 
 
 if __name__ == "__main__":
@@ -5,183 +5,237 @@ Tests for consumer group management functionality including listing, describing,
 """
 
 import asyncio
-import os
-import subprocess
-import sys
-from unittest.mock import patch
+import time
+from dataclasses import dataclass, fields
+from operator import itemgetter
 
 import pytest
+from confluent_kafka import Consumer, TopicPartition
+from confluent_kafka.admin import ConfigResource, NewTopic
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from test_utils import unique_name
 
-from kafka_cluster_manager import (
-    KafkaClusterManager, 
-    load_cluster_configurations
+
+# Valid consumer group states in Kafka
+_VALID_STATES = frozenset({
+    "Unknown",
+    "PreparingRebalance",
+    "CompletingRebalance",
+    "Stable",
+    "Dead",
+    "Empty"
+})
+
+# Common protocol types
+_PROTOCOL_TYPES = frozenset({"consumer", "connect", "streams"})
+
+# Consumer session timeout used unless the broker requires a longer one
+_SESSION_TIMEOUT_MS = 6000
+
+# Topics created up front by the group_topics fixture and shared by the class
+_GROUP_TOPIC_POOL_SIZE = 1
+
+
+@dataclass(slots=True, frozen=True)
+class Assignment:
+    """A topic partition assigned to a consumer group member."""
+    topic: str
+    partition: int
+
+
+@dataclass(slots=True, frozen=True)
+class MemberInfo:
+    """Consumer group member as reported by describe_consumer_group."""
+    member_id: str
+    client_id: str
+    client_host: str
+    assignments: tuple
+
+
+@dataclass(slots=True, frozen=True)
+class OffsetInfo:
+    """Committed offset entry as reported by describe_consumer_group."""
+    topic: str
+    partition: int
+    current_offset: int
+    metadata: str
+
+
+# Sample records shared by the structure tests
+_ASSIGNMENT = Assignment(topic="user-events", partition=0)
+_MEMBER = MemberInfo(
+    member_id="consumer-1-12345",
+    client_id="analytics-consumer",
+    client_host="/192.168.1.100",
+    assignments=(
+        Assignment(topic="user-events", partition=0),
+        Assignment(topic="user-events", partition=1)
+    )
+)
+_OFFSET_INFO = OffsetInfo(topic="user-events", partition=0, current_offset=1523, metadata="")
+_TOPIC_PARTITIONS = (
+    TopicPartition("test-topic", 0, offset=100),
+    TopicPartition("test-topic", 1, offset=200),
+    TopicPartition("another-topic", 0, offset=50),
 )
-from test_utils import run_docker_compose
 
+
+def _assert_field_types(record):
+    """Assert every dataclass field of record holds a value of its declared type."""
+    for field in fields(record):
+        assert isinstance(getattr(record, field.name), field.type), field.name
+
+
+async def _admin_result(futures):
+    """Await an AdminClient future (or a dict of them) without an executor hop."""
+    if isinstance(futures, dict):
+        results = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures.values()))
+        return dict(zip(futures, results))
+    return await asyncio.wrap_future(futures)
+
+
+async def _wait_until(executor, predicate, timeout=5.0, interval=0.1):
+    """Poll a blocking predicate on executor until it is true or timeout seconds pass; return whether it became true."""
+    loop = asyncio.get_running_loop()
+    deadline = time.monotonic() + timeout
+    while not await loop.run_in_executor(executor, predicate):
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(interval)
+    return True
+
+
+@pytest.mark.integration
+@pytest.mark.usefixtures("require_kafka")
 class TestConsumerGroupOperations:
     """Test consumer group-related operations."""
     
-    @classmethod
-    def setup_class(cls):
-        """Set up test environment."""
-        # Check if Kafka is available
-        try:
-            result = run_docker_compose([
-                '-f', 'docker-compose.test.yml', 
-                'exec', '-T', 'kafka', 
-                'kafka-topics', '--bootstrap-server', 'localhost:9092', '--list'
-            ], capture_output=True, text=True, timeout=10)
-            
-            if result.returncode != 0:
-                pytest.skip("Kafka test environment not available")
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            pytest.skip("Docker or Kafka not available for integration tests")
-    
-    def setup_method(self):
-        """Set up for each test method."""
-        # Configure environment for single cluster
-        self.env_patch = patch.dict(os.environ, {
-            'KAFKA_BOOTSTRAP_SERVERS': 'localhost:9092',
-            'KAFKA_SECURITY_PROTOCOL': 'PLAINTEXT',
-            'VIEWONLY': 'false'
-        })
-        self.env_patch.start()
+    @pytest.fixture(scope="class")
+    def group_topics(self, kafka_manager, kafka_available):
+        """Topics for this class, created and deleted with one admin request each."""
+        if not kafka_available:
+            pytest.skip("Kafka test environment not available")
+        
+        admin_client = kafka_manager.get_admin_client()
+        topics = [
+            NewTopic(unique_name("test-consumer-group-topic"), num_partitions=2, replication_factor=1)
+            for _ in range(_GROUP_TOPIC_POOL_SIZE)
+        ]
+        for future in admin_client.create_topics(topics, request_timeout=10).values():
+            future.result()
         
-        # Load cluster manager
-        self.manager = load_cluster_configurations()
+        yield [topic.topic for topic in topics]
+        
+        for future in admin_client.delete_topics([topic.topic for topic in topics], request_timeout=10).values():
+            future.result()
     
-    def teardown_method(self):
-        """Clean up after each test method."""
-        self.env_patch.stop()
-        self.manager.executor.shutdown(wait=True)
+    @pytest.fixture(scope="class")
+    def session_timeout_ms(self, kafka_manager, kafka_available):
+        """Consumer session timeout the broker accepts, read from its config once per class."""
+        if not kafka_available:
+            pytest.skip("Kafka test environment not available")
+        
+        admin_client = kafka_manager.get_admin_client()
+        broker_id = next(iter(admin_client.list_topics(timeout=10).brokers))
+        resource = ConfigResource(ConfigResource.Type.BROKER, str(broker_id))
+        configs = admin_client.describe_configs([resource], request_timeout=10)[resource].result()
+        
+        min_session_timeout = int(configs["group.min.session.timeout.ms"].value)
+        return max(_SESSION_TIMEOUT_MS, min_session_timeout)
     
     @pytest.mark.asyncio
-    async def test_list_consumer_groups_empty(self):
+    async def test_list_consumer_groups_empty(self, kafka_manager):
         """Test listing consumer groups when none exist."""
-        admin_client = self.manager.get_admin_client()
+        admin_client = kafka_manager.get_admin_client()
         
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            self.manager.executor,
-            lambda: admin_client.list_consumer_groups(timeout=10)
-        )
+        result = await _admin_result(admin_client.list_consumer_groups(timeout=10))
         
-        groups = result.result()
+        groups = result.valid
         # Should return empty list or minimal system groups
         assert isinstance(groups, list)
         # Length can be 0 or small number (system groups)
         assert len(groups) >= 0
     
     @pytest.mark.asyncio
-    async def test_create_and_describe_consumer_group(self):
+    async def test_create_and_describe_consumer_group(self, kafka_manager, group_topics, session_timeout_ms):
         """Test creating a consumer and describing its group."""
-        from confluent_kafka import Consumer, Producer
-        from confluent_kafka.admin import NewTopic
+        admin_client = kafka_manager.get_admin_client()
         
-        admin_client = self.manager.get_admin_client()
-        loop = asyncio.get_event_loop()
+        # Use a topic from the class-wide pool
+        topic_name = group_topics[0]
+        group_id = unique_name("test-consumer-group")
         
-        # Create a test topic first
-        topic_name = "test-consumer-group-topic"
-        group_id = "test-consumer-group"
-        
-        new_topic = NewTopic(topic_name, num_partitions=2, replication_factor=1)
+        # Wait for topic creation
+        assert await _wait_until(
+            kafka_manager.executor, lambda: topic_name in admin_client.list_topics(timeout=2).topics
+        ), f"topic {topic_name} did not appear"
+        
+        # Create a consumer to establish the group
+        consumer_config = {
+            'bootstrap.servers': 'localhost:9092',
+            'group.id': group_id,
+            'auto.offset.reset': 'earliest',
+            'session.timeout.ms': session_timeout_ms
+        }
         
-        # Create topic
-        await loop.run_in_executor(
-            self.manager.executor,
-            lambda: admin_client.create_topics([new_topic], request_timeout=10)
+        def create_consumer_group():
+            consumer = Consumer(consumer_config)
+            try:
+                # Subscribe to topic to create the group
+                consumer.subscribe([topic_name])
+                
+                # Poll in short slices until the group assigns partitions (at most ~5s)
+                for _ in range(50):
+                    consumer.poll(timeout=0.1)
+                    if consumer.assignment():
+                        break
+                
+                # Commit offsets to establish group state
+                consumer.commit()
+                
+                return True
+            finally:
+                consumer.close()
+        
+        # Create the consumer group
+        await asyncio.get_running_loop().run_in_executor(
+            kafka_manager.executor,
+            create_consumer_group
         )
         
-        # Wait for topic creation
-        await asyncio.sleep(2)
+        # Wait for group to be established
+        assert await _wait_until(
+            kafka_manager.executor,
+            lambda: group_id in [g.group_id for g in admin_client.list_consumer_groups(timeout=2).result().valid]
+        ), f"consumer group {group_id} was not listed"
         
-        try:
-            # Create a consumer to establish the group
-            consumer_config = {
-                'bootstrap.servers': 'localhost:9092',
-                'group.id': group_id,
-                'auto.offset.reset': 'earliest',
-                'session.timeout.ms': 6000,
-                'heartbeat.interval.ms': 1000
-            }
-            
-            def create_consumer_group():
-                consumer = Consumer(consumer_config)
-                try:
-                    # Subscribe to topic to create the group
-                    consumer.subscribe([topic_name])
-                    
-                    # Poll once to join the group
-                    consumer.poll(timeout=5.0)
-                    
-                    # Commit offsets to establish group state
-                    consumer.commit()
-                    
-                    return True
-                finally:
-                    consumer.close()
-            
-            # Create the consumer group
-            await loop.run_in_executor(
-                self.manager.executor,
-                create_consumer_group
-            )
-            
-            # Wait for group to be established
-            await asyncio.sleep(3)
-            
-            # List consumer groups
-            result = await loop.run_in_executor(
-                self.manager.executor,
-                lambda: admin_client.list_consumer_groups(timeout=10)
-            )
-            
-            groups = result.result()
-            group_ids = [group.group_id for group in groups]
-            
-            # Our test group should be in the list
-            assert group_id in group_ids
-            
-            # Describe the consumer group
-            describe_result = await loop.run_in_executor(
-                self.manager.executor,
-                lambda: admin_client.describe_consumer_groups([group_id], timeout=10)
-            )
-            
-            assert group_id in describe_result
-            group_description = describe_result[group_id].result()
-            
-            # Verify group properties
-            assert group_description.group_id == group_id
-            assert hasattr(group_description, 'state')
-            assert hasattr(group_description, 'protocol_type')
-            assert hasattr(group_description, 'coordinator')
-            
-        finally:
-            # Clean up - delete the test topic
-            await loop.run_in_executor(
-                self.manager.executor,
-                lambda: admin_client.delete_topics([topic_name], request_timeout=10)
-            )
+        # List and describe consumer groups; both admin requests are in flight together
+        groups_result, descriptions = await asyncio.gather(
+            _admin_result(admin_client.list_consumer_groups(timeout=10)),
+            _admin_result(admin_client.describe_consumer_groups([group_id], timeout=10))
+        )
+        assert group_id in descriptions
+        group_description = descriptions[group_id]
+        group_ids = [group.group_id for group in groups_result.valid]
+        
+        # Our test group should be in the list
+        assert group_id in group_ids
+        
+        # Verify group properties
+        assert group_description.group_id == group_id
+        assert group_description.state is not None
+        assert group_description.protocol_type is not None
+        assert group_description.coordinator is not None
     
     @pytest.mark.asyncio
-    async def test_describe_nonexistent_consumer_group(self):
+    async def test_describe_nonexistent_consumer_group(self, kafka_manager):
         """Test describing a consumer group that doesn't exist."""
-        admin_client = self.manager.get_admin_client()
+        admin_client = kafka_manager.get_admin_client()
         
         nonexistent_group = "nonexistent-consumer-group"
         
-        loop = asyncio.get_event_loop()
-        
         # Try to describe non-existent group
-        describe_result = await loop.run_in_executor(
-            self.manager.executor,
-            lambda: admin_client.describe_consumer_groups([nonexistent_group], timeout=10)
-        )
+        describe_result = admin_client.describe_consumer_groups([nonexistent_group], timeout=10)
         
         # Should contain the group ID in results
         assert nonexistent_group in describe_result
@@ -191,77 +245,38 @@ class TestConsumerGroupOperations:
         
         # The future should complete, but may contain an error
         try:
-            group_description = group_future.result()
+            group_description = await _admin_result(group_future)
             # If it succeeds, the group might exist or be in an unknown state
             assert hasattr(group_description, 'group_id')
         except Exception as e:
             # Expected: group doesn't exist
             assert "not exist" in str(e).lower() or "unknown" in str(e).lower()
 
+
 class TestConsumerGroupStates:
     """Test consumer group state management."""
     
-    def test_consumer_group_state_validation(self):
+    @pytest.mark.parametrize("state", sorted(_VALID_STATES))
+    def test_consumer_group_state_validation(self, state):
         """Test validation of consumer group states."""
-        # Valid consumer group states in Kafka
-        valid_states = [
-            "Unknown",
-            "PreparingRebalance",
-            "CompletingRebalance", 
-            "Stable",
-            "Dead",
-            "Empty"
-        ]
-        
         # Each state should be a valid string
-        for state in valid_states:
-            assert isinstance(state, str)
-            assert len(state) > 0
+        assert isinstance(state, str)
+        assert len(state) > 0
     
-    def test_consumer_group_protocol_types(self):
+    @pytest.mark.parametrize("protocol_type", sorted(_PROTOCOL_TYPES))
+    def test_consumer_group_protocol_types(self, protocol_type):
         """Test consumer group protocol types."""
-        # Common protocol types
-        protocol_types = ["consumer", "connect", "streams"]
-        
-        for protocol_type in protocol_types:
-            assert isinstance(protocol_type, str)
-            assert len(protocol_type) > 0
+        assert isinstance(protocol_type, str)
+        assert len(protocol_type) > 0
+
 
 class TestConsumerGroupOffsets:
     """Test consumer group offset operations."""
     
-    def setup_method(self):
-        """Set up for each test method."""
-        self.env_patch = patch.dict(os.environ, {
-            'KAFKA_BOOTSTRAP_SERVERS': 'localhost:9092',
-            'KAFKA_SECURITY_PROTOCOL': 'PLAINTEXT',
-            'VIEWONLY': 'false'
-        })
-        self.env_patch.start()
-        self.manager = load_cluster_configurations()
-    
-    def teardown_method(self):
-        """Clean up after each test method."""
-        self.env_patch.stop()
-        self.manager.executor.shutdown(wait=True)
-    
-    @pytest.mark.asyncio
-    async def test_consumer_offset_structure(self):
+    def test_consumer_offset_structure(self):
         """Test the structure of consumer offset information."""
-        from confluent_kafka import TopicPartition
-        
-        # Create sample TopicPartition objects to test structure
-        topic_partitions = [
-            TopicPartition("test-topic", 0, offset=100),
-            TopicPartition("test-topic", 1, offset=200),
-            TopicPartition("another-topic", 0, offset=50),
-        ]
-        
         # Verify structure matches what we expect in offset information
-        for tp in topic_partitions:
-            assert hasattr(tp, 'topic')
-            assert hasattr(tp, 'partition')
-            assert hasattr(tp, 'offset')
+        for tp in _TOPIC_PARTITIONS:
             assert isinstance(tp.topic, str)
             assert isinstance(tp.partition, int)
             assert isinstance(tp.offset, int)
@@ -270,128 +285,75 @@ class TestConsumerGroupOffsets:
     
     def test_offset_metadata_format(self):
         """Test offset metadata formatting."""
-        # Sample offset information structure
-        offset_info = {
-            "topic": "user-events",
-            "partition": 0,
-            "current_offset": 1523,
-            "metadata": ""
-        }
+        offset_info = _OFFSET_INFO
         
-        # Verify required fields are present
-        required_fields = ["topic", "partition", "current_offset", "metadata"]
-        for field in required_fields:
-            assert field in offset_info
-        
-        # Verify data types
-        assert isinstance(offset_info["topic"], str)
-        assert isinstance(offset_info["partition"], int)
-        assert isinstance(offset_info["current_offset"], int)
-        assert isinstance(offset_info["metadata"], str)
+        # Verify required fields are present with the declared types
+        _assert_field_types(offset_info)
         
         # Verify logical constraints
-        assert offset_info["partition"] >= 0
-        assert offset_info["current_offset"] >= 0
+        assert offset_info.partition >= 0
+        assert offset_info.current_offset >= 0
+
 
 class TestConsumerGroupAssignments:
     """Test consumer group partition assignments."""
     
-    def test_assignment_structure(self):
+    @pytest.mark.parametrize("assignment", (_ASSIGNMENT, *_MEMBER.assignments),
+                             ids=["single", "member-0", "member-1"])
+    def test_assignment_structure(self, assignment):
         """Test the structure of partition assignments."""
-        # Sample assignment structure
-        assignment = {
-            "topic": "user-events",
-            "partition": 0
-        }
-        
-        # Verify required fields
-        assert "topic" in assignment
-        assert "partition" in assignment
-        
-        # Verify data types
-        assert isinstance(assignment["topic"], str)
-        assert isinstance(assignment["partition"], int)
+        # Verify required fields and data types
+        _assert_field_types(assignment)
         
         # Verify constraints
-        assert len(assignment["topic"]) > 0
-        assert assignment["partition"] >= 0
+        assert len(assignment.topic) > 0
+        assert assignment.partition >= 0
     
     def test_member_assignment_structure(self):
         """Test consumer group member assignment structure."""
-        # Sample member information
-        member = {
-            "member_id": "consumer-1-12345",
-            "client_id": "analytics-consumer",
-            "client_host": "/192.168.1.100",
-            "assignments": [
-                {"topic": "user-events", "partition": 0},
-                {"topic": "user-events", "partition": 1}
-            ]
-        }
-        
-        # Verify required fields
-        required_fields = ["member_id", "client_id", "client_host", "assignments"]
-        for field in required_fields:
-            assert field in member
-        
-        # Verify data types
-        assert isinstance(member["member_id"], str)
-        assert isinstance(member["client_id"], str)
-        assert isinstance(member["client_host"], str)
-        assert isinstance(member["assignments"], list)
-        
-        # Verify assignments structure
-        for assignment in member["assignments"]:
-            assert "topic" in assignment
-            assert "partition" in assignment
-            assert isinstance(assignment["topic"], str)
-            assert isinstance(assignment["partition"], int)
+        # Verify required fields and data types; assignments are covered above
+        _assert_field_types(_MEMBER)
+
+
+@pytest.fixture(scope="module")
+def sample_groups():
+    """Consumer groups in several states, shared by the sorting and filtering tests."""
+    return (
+        {"group_id": "active-group-1", "state": "Stable"},
+        {"group_id": "dead-group", "state": "Dead"},
+        {"group_id": "active-group-2", "state": "Stable"},
+        {"group_id": "empty-group", "state": "Empty"},
+    )
+
 
 class TestConsumerGroupSorting:
     """Test consumer group sorting and filtering."""
     
-    def test_consumer_group_sorting(self):
+    @pytest.mark.parametrize("order", [(0, 1, 2, 3), (3, 2, 1, 0), (2, 0, 3, 1)],
+                             ids=["as-listed", "reversed", "shuffled"])
+    def test_consumer_group_sorting(self, sample_groups, order):
         """Test that consumer groups are sorted by group ID."""
-        # Sample consumer groups (unsorted)
-        groups = [
-            {"group_id": "zebra-group", "state": "Stable"},
-            {"group_id": "alpha-group", "state": "Stable"},
-            {"group_id": "beta-group", "state": "Empty"},
-        ]
+        groups = [sample_groups[i] for i in order]
         
         # Sort groups by group_id (simulating MCP tool behavior)
-        sorted_groups = sorted(groups, key=lambda x: x["group_id"])
+        sorted_groups = sorted(groups, key=itemgetter("group_id"))
         
-        expected_order = ["alpha-group", "beta-group", "zebra-group"]
+        expected_order = ["active-group-1", "active-group-2", "dead-group", "empty-group"]
         actual_order = [group["group_id"] for group in sorted_groups]
         
         assert actual_order == expected_order
     
-    def test_consumer_group_filtering_by_state(self):
+    @pytest.mark.parametrize("expected_state,expected_ids", [
+        ("Stable", {"active-group-1", "active-group-2"}),
+        ("Dead", {"dead-group"}),
+        ("Empty", {"empty-group"}),
+    ])
+    def test_consumer_group_filtering_by_state(self, sample_groups, expected_state, expected_ids):
         """Test filtering consumer groups by state."""
-        # Sample consumer groups with different states
-        groups = [
-            {"group_id": "active-group-1", "state": "Stable"},
-            {"group_id": "dead-group", "state": "Dead"},
-            {"group_id": "active-group-2", "state": "Stable"},
-            {"group_id": "empty-group", "state": "Empty"},
-        ]
-        
-        # Filter for active (Stable) groups
-        active_groups = [group for group in groups if group["state"] == "Stable"]
-        
-        expected_active = ["active-group-1", "active-group-2"]
-        actual_active = [group["group_id"] for group in active_groups]
+        matching = {group["group_id"] for group in sample_groups if group["state"] == expected_state}
         
-        assert sorted(actual_active) == sorted(expected_active)
-        
-        # Filter for non-active groups
-        inactive_groups = [group for group in groups if group["state"] != "Stable"]
-        
-        expected_inactive = ["dead-group", "empty-group"]
-        actual_inactive = [group["group_id"] for group in inactive_groups]
-        
-        assert sorted(actual_inactive) == sorted(expected_inactive)
+        assert matching == expected_ids
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
@@ -5,205 +5,260 @@ Tests for multi-cluster functionality including configuration, operations, and c
 """
 
 import asyncio
-import os
-import subprocess
-import sys
-from unittest.mock import patch
+import re
+from functools import partial
 
 import pytest
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
 from kafka_cluster_manager import (
     KafkaClusterConfig, 
     KafkaClusterManager, 
     load_cluster_configurations
 )
-from test_utils import run_docker_compose
+import kafka_mcp_resources
+import kafka_mcp_tools
+from test_utils import FakeAdminClient, FakeBroker, FakeMetadata, FakePartition, FakeTopic
 
-class TestMultiClusterConfiguration:
-    """Test multi-cluster configuration loading and management."""
+# Error patterns shared by the pytest.raises(match=...) checks below
+NONEXISTENT_RE = re.compile(r"Cluster 'nonexistent' not found")
+MULTI_RE = re.compile(r"Multiple clusters available")
+
+# Cluster environments shared by the tests below, built once at import
+ENV_THREE_TIER = {
+    'KAFKA_CLUSTER_NAME_1': 'development',
+    'KAFKA_BOOTSTRAP_SERVERS_1': 'dev-kafka:9092',
+    'KAFKA_SECURITY_PROTOCOL_1': 'PLAINTEXT',
+    'VIEWONLY_1': 'false',
     
-    def test_multi_cluster_config_loading(self):
-        """Test loading multiple cluster configurations from environment."""
-        with patch.dict(os.environ, {
-            'KAFKA_CLUSTER_NAME_1': 'development',
-            'KAFKA_BOOTSTRAP_SERVERS_1': 'dev-kafka:9092',
-            'KAFKA_SECURITY_PROTOCOL_1': 'PLAINTEXT',
-            'VIEWONLY_1': 'false',
-            
-            'KAFKA_CLUSTER_NAME_2': 'staging',
-            'KAFKA_BOOTSTRAP_SERVERS_2': 'staging-kafka:9092',
-            'KAFKA_SECURITY_PROTOCOL_2': 'SASL_PLAINTEXT',
-            'KAFKA_SASL_MECHANISM_2': 'PLAIN',
-            'KAFKA_SASL_USERNAME_2': 'staging-user',
-            'KAFKA_SASL_PASSWORD_2': 'staging-password',
-            'VIEWONLY_2': 'false',
-            
-            'KAFKA_CLUSTER_NAME_3': 'production',
-            'KAFKA_BOOTSTRAP_SERVERS_3': 'prod-kafka:9092',
-            'KAFKA_SECURITY_PROTOCOL_3': 'SASL_SSL',
-            'KAFKA_SASL_MECHANISM_3': 'SCRAM-SHA-256',
-            'KAFKA_SASL_USERNAME_3': 'prod-user',
-            'KAFKA_SASL_PASSWORD_3': 'prod-password',
-            'VIEWONLY_3': 'true',
-        }, clear=True):
-            manager = load_cluster_configurations()
-            
-            # Should have loaded 3 clusters
-            assert len(manager.clusters) == 3
-            
-            # Verify each cluster is configured correctly
-            dev_config = manager.get_cluster_config('development')
-            assert dev_config.name == 'development'
-            assert dev_config.bootstrap_servers == 'dev-kafka:9092'
-            assert dev_config.security_protocol == 'PLAINTEXT'
-            assert dev_config.viewonly is False
-            
-            staging_config = manager.get_cluster_config('staging')
-            assert staging_config.name == 'staging'
-            assert staging_config.bootstrap_servers == 'staging-kafka:9092'
-            assert staging_config.security_protocol == 'SASL_PLAINTEXT'
-            assert staging_config.sasl_mechanism == 'PLAIN'
-            assert staging_config.viewonly is False
-            
-            prod_config = manager.get_cluster_config('production')
-            assert prod_config.name == 'production'
-            assert prod_config.bootstrap_servers == 'prod-kafka:9092'
-            assert prod_config.security_protocol == 'SASL_SSL'
-            assert prod_config.sasl_mechanism == 'SCRAM-SHA-256'
-            assert prod_config.sasl_username == 'prod-user'
-            assert prod_config.sasl_password == 'prod-password'
-            assert prod_config.viewonly is True
+    'KAFKA_CLUSTER_NAME_2': 'staging',
+    'KAFKA_BOOTSTRAP_SERVERS_2': 'staging-kafka:9092',
+    'KAFKA_SECURITY_PROTOCOL_2': 'SASL_PLAINTEXT',
+    'KAFKA_SASL_MECHANISM_2': 'PLAIN',
+    'KAFKA_SASL_USERNAME_2': 'staging-user',
+    'KAFKA_SASL_PASSWORD_2': 'staging-password',
+    'VIEWONLY_2': 'false',
     
-    def test_partial_cluster_configuration(self):
-        """Test loading when only some clusters are configured."""
-        with patch.dict(os.environ, {
-            'KAFKA_CLUSTER_NAME_1': 'cluster1',
-            'KAFKA_BOOTSTRAP_SERVERS_1': 'kafka1:9092',
-            
-            'KAFKA_CLUSTER_NAME_3': 'cluster3',  # Skip cluster 2
-            'KAFKA_BOOTSTRAP_SERVERS_3': 'kafka3:9092',
-            
-            'KAFKA_CLUSTER_NAME_5': 'cluster5',  # Skip cluster 4
-            'KAFKA_BOOTSTRAP_SERVERS_5': 'kafka5:9092',
-        }, clear=True):
-            manager = load_cluster_configurations()
-            
-            # Should have loaded 3 clusters (1, 3, 5)
-            assert len(manager.clusters) == 3
-            assert 'cluster1' in manager.clusters
-            assert 'cluster3' in manager.clusters
-            assert 'cluster5' in manager.clusters
-            
-            # Should not have clusters 2 or 4
-            assert 'cluster2' not in manager.clusters
-            assert 'cluster4' not in manager.clusters
+    'KAFKA_CLUSTER_NAME_3': 'production',
+    'KAFKA_BOOTSTRAP_SERVERS_3': 'prod-kafka:9092',
+    'KAFKA_SECURITY_PROTOCOL_3': 'SASL_SSL',
+    'KAFKA_SASL_MECHANISM_3': 'SCRAM-SHA-256',
+    'KAFKA_SASL_USERNAME_3': 'prod-user',
+    'KAFKA_SASL_PASSWORD_3': 'prod-password',
+    'VIEWONLY_3': 'true',
+}
+
+# The two local test clusters (docker-compose.test.yml)
+ENV_TWO_LOCAL = {
+    'KAFKA_CLUSTER_NAME_1': 'cluster1',
+    'KAFKA_BOOTSTRAP_SERVERS_1': 'localhost:9092',
+    'KAFKA_SECURITY_PROTOCOL_1': 'PLAINTEXT',
+    'VIEWONLY_1': 'false',
     
-    def test_max_cluster_limit(self):
-        """Test that we support up to 8 clusters."""
-        env_vars = {}
-        
-        # Configure 8 clusters
-        for i in range(1, 9):
-            env_vars[f'KAFKA_CLUSTER_NAME_{i}'] = f'cluster{i}'
-            env_vars[f'KAFKA_BOOTSTRAP_SERVERS_{i}'] = f'kafka{i}:9092'
+    'KAFKA_CLUSTER_NAME_2': 'cluster2',
+    'KAFKA_BOOTSTRAP_SERVERS_2': 'localhost:9093',
+    'KAFKA_SECURITY_PROTOCOL_2': 'PLAINTEXT',
+    'VIEWONLY_2': 'false',
+}
+
+# Writable dev cluster next to a viewonly prod cluster
+ENV_MIXED_VIEWONLY = {
+    'KAFKA_CLUSTER_NAME_1': 'dev',
+    'KAFKA_BOOTSTRAP_SERVERS_1': 'localhost:9092',
+    'VIEWONLY_1': 'false',
+    
+    'KAFKA_CLUSTER_NAME_2': 'prod',
+    'KAFKA_BOOTSTRAP_SERVERS_2': 'localhost:9093',
+    'VIEWONLY_2': 'true',  # Production is viewonly
+}
+
+# A single cluster with an explicit name
+ENV_SINGLE_NAMED = {
+    'KAFKA_CLUSTER_NAME_1': 'only-cluster',
+    'KAFKA_BOOTSTRAP_SERVERS_1': 'localhost:9092',
+}
+
+# A cluster literally named 'default' next to another one
+ENV_DEFAULT_NAMED = {
+    'KAFKA_CLUSTER_NAME_1': 'default',
+    'KAFKA_BOOTSTRAP_SERVERS_1': 'localhost:9092',
+    
+    'KAFKA_CLUSTER_NAME_2': 'other',
+    'KAFKA_BOOTSTRAP_SERVERS_2': 'localhost:9093',
+}
+
+# Different authentication per cluster
+ENV_MULTI_AUTH = {
+    # Cluster 1: No authentication
+    'KAFKA_CLUSTER_NAME_1': 'dev',
+    'KAFKA_BOOTSTRAP_SERVERS_1': 'dev-kafka:9092',
+    'KAFKA_SECURITY_PROTOCOL_1': 'PLAINTEXT',
+    
+    # Cluster 2: SASL/PLAIN
+    'KAFKA_CLUSTER_NAME_2': 'staging',
+    'KAFKA_BOOTSTRAP_SERVERS_2': 'staging-kafka:9092',
+    'KAFKA_SECURITY_PROTOCOL_2': 'SASL_PLAINTEXT',
+    'KAFKA_SASL_MECHANISM_2': 'PLAIN',
+    'KAFKA_SASL_USERNAME_2': 'staging-user',
+    'KAFKA_SASL_PASSWORD_2': 'staging-pass',
+    
+    # Cluster 3: SASL/SCRAM with SSL
+    'KAFKA_CLUSTER_NAME_3': 'prod',
+    'KAFKA_BOOTSTRAP_SERVERS_3': 'prod-kafka:9092',
+    'KAFKA_SECURITY_PROTOCOL_3': 'SASL_SSL',
+    'KAFKA_SASL_MECHANISM_3': 'SCRAM-SHA-256',
+    'KAFKA_SASL_USERNAME_3': 'prod-user',
+    'KAFKA_SASL_PASSWORD_3': 'prod-password',
+}
+
+# Eight configured clusters plus a ninth slot that must be ignored
+_MAX_CLUSTERS_ENV = (
+    {f'KAFKA_CLUSTER_NAME_{i}': f'cluster{i}' for i in range(1, 10)}
+    | {f'KAFKA_BOOTSTRAP_SERVERS_{i}': f'kafka{i}:9092' for i in range(1, 10)}
+)
+
+# (environment, expected cluster names, expected attributes per cluster), built once at import
+CONFIG_CASES = [
+    # Loading multiple cluster configurations from environment
+    (ENV_THREE_TIER, {'development', 'staging', 'production'}, {
+        'development': {
+            'bootstrap_servers': 'dev-kafka:9092',
+            'security_protocol': 'PLAINTEXT',
+            'viewonly': False,
+        },
+        'staging': {
+            'bootstrap_servers': 'staging-kafka:9092',
+            'security_protocol': 'SASL_PLAINTEXT',
+            'sasl_mechanism': 'PLAIN',
+            'viewonly': False,
+        },
+        'production': {
+            'bootstrap_servers': 'prod-kafka:9092',
+            'security_protocol': 'SASL_SSL',
+            'sasl_mechanism': 'SCRAM-SHA-256',
+            'sasl_username': 'prod-user',
+            'sasl_password': 'prod-password',
+            'viewonly': True,
+        },
+    }),
+    # Only some cluster slots configured (2 and 4 are skipped)
+    ({
+        'KAFKA_CLUSTER_NAME_1': 'cluster1',
+        'KAFKA_BOOTSTRAP_SERVERS_1': 'kafka1:9092',
+        'KAFKA_CLUSTER_NAME_3': 'cluster3',
+        'KAFKA_BOOTSTRAP_SERVERS_3': 'kafka3:9092',
+        'KAFKA_CLUSTER_NAME_5': 'cluster5',
+        'KAFKA_BOOTSTRAP_SERVERS_5': 'kafka5:9092',
+    }, {'cluster1', 'cluster3', 'cluster5'}, {}),
+    # Up to 8 clusters are supported; the 9th is ignored
+    (_MAX_CLUSTERS_ENV, {f'cluster{i}' for i in range(1, 9)}, {}),
+    # Clusters with a missing name or missing servers are skipped
+    ({
+        'KAFKA_CLUSTER_NAME_1': 'valid-cluster',
+        'KAFKA_BOOTSTRAP_SERVERS_1': 'kafka1:9092',
+        # Missing servers for cluster 2
+        'KAFKA_CLUSTER_NAME_2': 'missing-servers',
+        # Missing name for cluster 3
+        'KAFKA_BOOTSTRAP_SERVERS_3': 'kafka3:9092',
+        'KAFKA_CLUSTER_NAME_4': 'another-valid',
+        'KAFKA_BOOTSTRAP_SERVERS_4': 'kafka4:9092',
+    }, {'valid-cluster', 'another-valid'}, {}),
+    # Viewonly mode set per cluster
+    (ENV_MIXED_VIEWONLY, {'dev', 'prod'}, {'dev': {'viewonly': False}, 'prod': {'viewonly': True}}),
+]
+
+class TestMultiClusterConfiguration:
+    """Test multi-cluster configuration loading and management."""
+    
+    @pytest.mark.parametrize("env,names,attrs", CONFIG_CASES,
+                             ids=["multi_cluster", "partial", "max_cluster_limit", "missing_name_or_servers", "mixed_viewonly"])
+    def test_cluster_configuration_loading(self, env, names, attrs):
+        """Test which clusters are loaded from the environment, and with which settings."""
+        manager = load_cluster_configurations(env)
         
-        # Try to configure a 9th cluster (should be ignored)
-        env_vars['KAFKA_CLUSTER_NAME_9'] = 'cluster9'
-        env_vars['KAFKA_BOOTSTRAP_SERVERS_9'] = 'kafka9:9092'
+        assert set(manager.clusters) == names
         
-        with patch.dict(os.environ, env_vars, clear=True):
-            manager = load_cluster_configurations()
-            
-            # Should have exactly 8 clusters (9th should be ignored)
-            assert len(manager.clusters) == 8
-            
-            # Verify all 8 clusters are present
-            for i in range(1, 9):
-                assert f'cluster{i}' in manager.clusters
-            
-            # 9th cluster should not be present
-            assert 'cluster9' not in manager.clusters
+        for cluster_name, expected in attrs.items():
+            config = manager.get_cluster_config(cluster_name)
+            assert config.name == cluster_name
+            for attr, value in expected.items():
+                assert getattr(config, attr) == value, attr
+
+@pytest.fixture(scope="module")
+def clusters_manager():
+    """Manager for the two local test clusters, built once per module."""
+    manager = load_cluster_configurations(ENV_TWO_LOCAL)
     
-    def test_cluster_with_missing_name_or_servers(self):
-        """Test that clusters with missing name or servers are skipped."""
-        with patch.dict(os.environ, {
-            'KAFKA_CLUSTER_NAME_1': 'valid-cluster',
-            'KAFKA_BOOTSTRAP_SERVERS_1': 'kafka1:9092',
-            
-            # Missing servers for cluster 2
-            'KAFKA_CLUSTER_NAME_2': 'missing-servers',
-            # No KAFKA_BOOTSTRAP_SERVERS_2
-            
-            # Missing name for cluster 3
-            # No KAFKA_CLUSTER_NAME_3
-            'KAFKA_BOOTSTRAP_SERVERS_3': 'kafka3:9092',
-            
-            'KAFKA_CLUSTER_NAME_4': 'another-valid',
-            'KAFKA_BOOTSTRAP_SERVERS_4': 'kafka4:9092',
-        }, clear=True):
-            manager = load_cluster_configurations()
-            
-            # Should have loaded only the valid clusters (1 and 4)
-            assert len(manager.clusters) == 2
-            assert 'valid-cluster' in manager.clusters
-            assert 'another-valid' in manager.clusters
-            
-            # Invalid clusters should not be present
-            assert 'missing-servers' not in manager.clusters
+    yield manager
+    manager.close()
 
-class TestMultiClusterOperations:
-    """Test operations across multiple clusters."""
+async def _metadata_by_cluster(manager, cluster_names=('cluster1', 'cluster2')):
+    """Fetch metadata from each named cluster concurrently, keyed by cluster name."""
+    admin_clients = {name: manager.get_admin_client(name) for name in cluster_names}
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(
+        loop.run_in_executor(manager.executor, partial(admin_client.list_topics, timeout=10))
+        for admin_client in admin_clients.values()
+    ))
+    return dict(zip(admin_clients, results))
+
+def _fake_topic(name, partition_count):
+    """In-memory topic with partition_count fully replicated partitions."""
+    partition = FakePartition(leader=1, replicas=[1, 2, 3], isrs=[1, 2, 3])
+    return FakeTopic(name=name, partitions={p: partition for p in range(partition_count)})
+
+class TestMultiClusterOperationsLogic:
+    """Test the cross-cluster tools against in-memory admin clients, without Kafka."""
     
-    @classmethod
-    def setup_class(cls):
-        """Set up test environment."""
-        # Check if both Kafka clusters are available
-        try:
-            # Test cluster 1
-            result1 = run_docker_compose([
-                '-f', 'docker-compose.test.yml', 
-                'exec', '-T', 'kafka', 
-                'kafka-topics', '--bootstrap-server', 'localhost:9092', '--list'
-            ], capture_output=True, text=True, timeout=10)
-            
-            # Test cluster 2
-            result2 = run_docker_compose([
-                '-f', 'docker-compose.test.yml', 
-                'exec', '-T', 'kafka-cluster-2', 
-                'kafka-topics', '--bootstrap-server', 'localhost:9093', '--list'
-            ], capture_output=True, text=True, timeout=10)
-            
-            if result1.returncode != 0 or result2.returncode != 0:
-                pytest.skip("Multi-cluster test environment not available")
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            pytest.skip("Docker or Kafka not available for integration tests")
+    @pytest.fixture(autouse=True)
+    def _fake_clients(self, clusters_manager, monkeypatch):
+        """Serve distinct in-memory metadata for cluster1 and cluster2 to the tools and resources."""
+        fake_clients = {
+            name: FakeAdminClient(FakeMetadata(
+                cluster_id=f"fake-{name}",
+                controller_id=1,
+                brokers={1: FakeBroker(host=f"{name}-kafka-1")},
+                topics={topic.name: topic for topic in topics},
+            ))
+            for name, topics in (
+                ("cluster1", (_fake_topic("orders", 3), _fake_topic("payments", 1))),
+                ("cluster2", (_fake_topic("orders", 6), _fake_topic("audit", 1))),
+            )
+        }
+        monkeypatch.setattr(clusters_manager, "get_admin_client", fake_clients.__getitem__)
+        monkeypatch.setattr(kafka_mcp_tools, "cluster_manager", clusters_manager)
+        monkeypatch.setattr(kafka_mcp_resources, "cluster_manager", clusters_manager)
     
-    def setup_method(self):
-        """Set up for each test method."""
-        # Configure environment for multi-cluster
-        self.env_patch = patch.dict(os.environ, {
-            'KAFKA_CLUSTER_NAME_1': 'cluster1',
-            'KAFKA_BOOTSTRAP_SERVERS_1': 'localhost:9092',
-            'KAFKA_SECURITY_PROTOCOL_1': 'PLAINTEXT',
-            'VIEWONLY_1': 'false',
-            
-            'KAFKA_CLUSTER_NAME_2': 'cluster2',
-            'KAFKA_BOOTSTRAP_SERVERS_2': 'localhost:9093',
-            'KAFKA_SECURITY_PROTOCOL_2': 'PLAINTEXT',
-            'VIEWONLY_2': 'false',
-        }, clear=True)
-        self.env_patch.start()
+    @pytest.mark.asyncio
+    async def test_list_topics_across_clusters(self):
+        """Test that list_topics merges every cluster's topics, tagged with their cluster."""
+        topics = await kafka_mcp_tools.list_topics()
         
-        # Load cluster manager
-        self.manager = load_cluster_configurations()
+        assert [(t["cluster"], t["name"]) for t in topics] == [
+            ("cluster1", "orders"), ("cluster1", "payments"), ("cluster2", "audit"), ("cluster2", "orders")
+        ]
     
-    def teardown_method(self):
-        """Clean up after each test method."""
-        self.env_patch.stop()
-        self.manager.executor.shutdown(wait=True)
+    @pytest.mark.asyncio
+    async def test_cluster_comparison(self):
+        """Test that compare_cluster_topics reports missing topics and partition differences."""
+        comparison = await kafka_mcp_tools.compare_cluster_topics("cluster1", "cluster2")
+        
+        assert comparison["only_in_source"] == ["payments"]
+        assert comparison["only_in_target"] == ["audit"]
+        assert comparison["topic_differences"] == [
+            {"topic": "orders", "differences": {"partitions": {"source": 3, "target": 6}}}
+        ]
+        assert comparison["summary"]["common_topics"] == 1
+
+@pytest.mark.integration
+@pytest.mark.xdist_group("kafka_clusters")
+@pytest.mark.usefixtures("require_kafka_clusters")
+class TestMultiClusterOperations:
+    """Test operations across multiple clusters."""
+    
+    @pytest.fixture(autouse=True)
+    def _manager(self, clusters_manager):
+        """Expose the shared multi-cluster manager to each test."""
+        self.manager = clusters_manager
     
     @pytest.mark.asyncio
     async def test_cluster_specific_operations(self):
@@ -216,17 +271,12 @@ class TestMultiClusterOperations:
         assert admin_client_2 is not None
         assert admin_client_1 != admin_client_2  # Different clients
         
-        loop = asyncio.get_event_loop()
-        
-        # Get metadata from each cluster
-        metadata_1 = await loop.run_in_executor(
-            self.manager.executor,
-            lambda: admin_client_1.list_topics(timeout=10)
-        )
+        loop = asyncio.get_running_loop()
         
-        metadata_2 = await loop.run_in_executor(
-            self.manager.executor,
-            lambda: admin_client_2.list_topics(timeout=10)
+        # Get metadata from both clusters concurrently
+        metadata_1, metadata_2 = await asyncio.gather(
+            loop.run_in_executor(self.manager.executor, partial(admin_client_1.list_topics, timeout=10)),
+            loop.run_in_executor(self.manager.executor, partial(admin_client_2.list_topics, timeout=10))
         )
         
         # Both should succeed
@@ -243,40 +293,19 @@ class TestMultiClusterOperations:
     @pytest.mark.asyncio
     async def test_cluster_comparison(self):
         """Test comparing information across clusters."""
-        loop = asyncio.get_event_loop()
-        
-        # Get broker information from both clusters
-        admin_client_1 = self.manager.get_admin_client('cluster1')
-        admin_client_2 = self.manager.get_admin_client('cluster2')
-        
-        metadata_1 = await loop.run_in_executor(
-            self.manager.executor,
-            lambda: admin_client_1.list_topics(timeout=10)
-        )
-        
-        metadata_2 = await loop.run_in_executor(
-            self.manager.executor,
-            lambda: admin_client_2.list_topics(timeout=10)
-        )
-        
-        # Compare broker counts
-        brokers_1 = len(metadata_1.brokers)
-        brokers_2 = len(metadata_2.brokers)
+        # Get broker information from both clusters concurrently
+        metadata = await _metadata_by_cluster(self.manager)
         
         # Both should have at least one broker
-        assert brokers_1 >= 1
-        assert brokers_2 >= 1
-        
-        # Compare cluster IDs (should be different)
-        cluster_id_1 = metadata_1.cluster_id
-        cluster_id_2 = metadata_2.cluster_id
+        brokers = {name: len(m.brokers) for name, m in metadata.items()}
+        assert all(count >= 1 for count in brokers.values()), brokers
         
         # Cluster IDs should be different (if both are set)
-        if cluster_id_1 and cluster_id_2:
-            assert cluster_id_1 != cluster_id_2
+        cluster_ids = [m.cluster_id for m in metadata.values() if m.cluster_id]
+        assert len(set(cluster_ids)) == len(cluster_ids)
     
     def test_viewonly_mode_per_cluster(self):
-        """Test that viewonly mode can be set per cluster."""
+        """Test the viewonly flags of the shared test clusters."""
         # Check viewonly status for each cluster
         cluster1_viewonly = self.manager.is_viewonly('cluster1')
         cluster2_viewonly = self.manager.is_viewonly('cluster2')
@@ -284,130 +313,75 @@ class TestMultiClusterOperations:
         # Based on our configuration, both should be writable
         assert cluster1_viewonly is False
         assert cluster2_viewonly is False
-        
-        # Test configuration with mixed viewonly settings
-        with patch.dict(os.environ, {
-            'KAFKA_CLUSTER_NAME_1': 'dev',
-            'KAFKA_BOOTSTRAP_SERVERS_1': 'localhost:9092',
-            'VIEWONLY_1': 'false',
-            
-            'KAFKA_CLUSTER_NAME_2': 'prod',
-            'KAFKA_BOOTSTRAP_SERVERS_2': 'localhost:9093',
-            'VIEWONLY_2': 'true',  # Production is viewonly
-        }, clear=True):
-            mixed_manager = load_cluster_configurations()
-            
-            assert mixed_manager.is_viewonly('dev') is False
-            assert mixed_manager.is_viewonly('prod') is True
 
 class TestMultiClusterErrorHandling:
     """Test error handling in multi-cluster scenarios."""
     
     def test_invalid_cluster_name_access(self):
         """Test accessing a cluster that doesn't exist."""
-        with patch.dict(os.environ, {
-            'KAFKA_CLUSTER_NAME_1': 'only-cluster',
-            'KAFKA_BOOTSTRAP_SERVERS_1': 'localhost:9092',
-        }, clear=True):
-            manager = load_cluster_configurations()
-            
-            # Should work for valid cluster
-            config = manager.get_cluster_config('only-cluster')
-            assert config.name == 'only-cluster'
-            
-            # Should fail for invalid cluster
-            with pytest.raises(ValueError, match="Cluster 'nonexistent' not found"):
-                manager.get_cluster_config('nonexistent')
-            
-            with pytest.raises(ValueError, match="Cluster 'nonexistent' not found"):
-                manager.get_admin_client('nonexistent')
+        manager = load_cluster_configurations(ENV_SINGLE_NAMED)
+        
+        # Should work for valid cluster
+        config = manager.get_cluster_config('only-cluster')
+        assert config.name == 'only-cluster'
+        
+        # Should fail for invalid cluster
+        with pytest.raises(ValueError, match=NONEXISTENT_RE):
+            manager.get_cluster_config('nonexistent')
+        
+        with pytest.raises(ValueError, match=NONEXISTENT_RE):
+            manager.get_admin_client('nonexistent')
     
     def test_ambiguous_default_cluster(self):
         """Test behavior when multiple clusters exist but no specific cluster is requested."""
-        with patch.dict(os.environ, {
-            'KAFKA_CLUSTER_NAME_1': 'cluster1',
-            'KAFKA_BOOTSTRAP_SERVERS_1': 'localhost:9092',
-            
-            'KAFKA_CLUSTER_NAME_2': 'cluster2',
-            'KAFKA_BOOTSTRAP_SERVERS_2': 'localhost:9093',
-        }, clear=True):
-            manager = load_cluster_configurations()
-            
-            # Should fail when trying to get default config with multiple clusters
-            with pytest.raises(ValueError, match="Multiple clusters available"):
-                manager.get_cluster_config()  # No cluster specified
-            
-            with pytest.raises(ValueError, match="Multiple clusters available"):
-                manager.get_admin_client()  # No cluster specified
+        manager = load_cluster_configurations(ENV_TWO_LOCAL)
+        
+        # Should fail when trying to get default config with multiple clusters
+        with pytest.raises(ValueError, match=MULTI_RE):
+            manager.get_cluster_config()  # No cluster specified
+        
+        with pytest.raises(ValueError, match=MULTI_RE):
+            manager.get_admin_client()  # No cluster specified
     
     def test_cluster_with_default_name(self):
         """Test that a cluster named 'default' can be accessed as default."""
-        with patch.dict(os.environ, {
-            'KAFKA_CLUSTER_NAME_1': 'default',
-            'KAFKA_BOOTSTRAP_SERVERS_1': 'localhost:9092',
-            
-            'KAFKA_CLUSTER_NAME_2': 'other',
-            'KAFKA_BOOTSTRAP_SERVERS_2': 'localhost:9093',
-        }, clear=True):
-            manager = load_cluster_configurations()
-            
-            # Should be able to access 'default' cluster without specifying name
-            config = manager.get_cluster_config()
-            assert config.name == 'default'
-            
-            admin_client = manager.get_admin_client()
-            assert admin_client is not None
-            
-            # Should also be able to access it by name
-            config_by_name = manager.get_cluster_config('default')
-            assert config_by_name.name == 'default'
+        manager = load_cluster_configurations(ENV_DEFAULT_NAMED)
+        
+        # Should be able to access 'default' cluster without specifying name
+        config = manager.get_cluster_config()
+        assert config.name == 'default'
+        
+        admin_client = manager.get_admin_client()
+        assert admin_client is not None
+        
+        # Should also be able to access it by name
+        config_by_name = manager.get_cluster_config('default')
+        assert config_by_name.name == 'default'
 
 class TestMultiClusterAuthentication:
     """Test authentication configuration across multiple clusters."""
     
     def test_different_auth_per_cluster(self):
         """Test that different authentication can be configured per cluster."""
-        with patch.dict(os.environ, {
-            # Cluster 1: No authentication
-            'KAFKA_CLUSTER_NAME_1': 'dev',
-            'KAFKA_BOOTSTRAP_SERVERS_1': 'dev-kafka:9092',
-            'KAFKA_SECURITY_PROTOCOL_1': 'PLAINTEXT',
-            
-            # Cluster 2: SASL/PLAIN
-            'KAFKA_CLUSTER_NAME_2': 'staging',
-            'KAFKA_BOOTSTRAP_SERVERS_2': 'staging-kafka:9092',
-            'KAFKA_SECURITY_PROTOCOL_2': 'SASL_PLAINTEXT',
-            'KAFKA_SASL_MECHANISM_2': 'PLAIN',
-            'KAFKA_SASL_USERNAME_2': 'staging-user',
-            'KAFKA_SASL_PASSWORD_2': 'staging-pass',
-            
-            # Cluster 3: SASL/SCRAM with SSL
-            'KAFKA_CLUSTER_NAME_3': 'prod',
-            'KAFKA_BOOTSTRAP_SERVERS_3': 'prod-kafka:9092',
-            'KAFKA_SECURITY_PROTOCOL_3': 'SASL_SSL',
-            'KAFKA_SASL_MECHANISM_3': 'SCRAM-SHA-256',
-            'KAFKA_SASL_USERNAME_3': 'prod-user',
-            'KAFKA_SASL_PASSWORD_3': 'prod-password',
-        }, clear=True):
-            manager = load_cluster_configurations()
-            
-            # Verify each cluster has different authentication
-            dev_config = manager.get_cluster_config('dev')
-            assert dev_config.security_protocol == 'PLAINTEXT'
-            assert dev_config.sasl_mechanism is None
-            assert dev_config.sasl_username is None
-            
-            staging_config = manager.get_cluster_config('staging')
-            assert staging_config.security_protocol == 'SASL_PLAINTEXT'
-            assert staging_config.sasl_mechanism == 'PLAIN'
-            assert staging_config.sasl_username == 'staging-user'
-            assert staging_config.sasl_password == 'staging-pass'
-            
-            prod_config = manager.get_cluster_config('prod')
-            assert prod_config.security_protocol == 'SASL_SSL'
-            assert prod_config.sasl_mechanism == 'SCRAM-SHA-256'
-            assert prod_config.sasl_username == 'prod-user'
-            assert prod_config.sasl_password == 'prod-password'
+        manager = load_cluster_configurations(ENV_MULTI_AUTH)
+        
+        # Verify each cluster has different authentication
+        dev_config = manager.get_cluster_config('dev')
+        assert dev_config.security_protocol == 'PLAINTEXT'
+        assert dev_config.sasl_mechanism is None
+        assert dev_config.sasl_username is None
+        
+        staging_config = manager.get_cluster_config('staging')
+        assert staging_config.security_protocol == 'SASL_PLAINTEXT'
+        assert staging_config.sasl_mechanism == 'PLAIN'
+        assert staging_config.sasl_username == 'staging-user'
+        assert staging_config.sasl_password == 'staging-pass'
+        
+        prod_config = manager.get_cluster_config('prod')
+        assert prod_config.security_protocol == 'SASL_SSL'
+        assert prod_config.sasl_mechanism == 'SCRAM-SHA-256'
+        assert prod_config.sasl_username == 'prod-user'
+        assert prod_config.sasl_password == 'prod-password'
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
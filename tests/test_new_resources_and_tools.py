@@ -4,25 +4,17 @@ Tests for new MCP resources and tools
 Tests the new kafka:// resources and corresponding get_ tools added in the latest version.
 """
 
-import asyncio
 import json
-import os
-import sys
-import unittest
-from unittest.mock import patch, MagicMock, AsyncMock
-from typing import Dict, List, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
 
 import pytest
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
-from kafka_cluster_manager import (
-    KafkaClusterConfig,
-    KafkaClusterManager,
-    load_cluster_configurations
-)
+from kafka_cluster_manager import KafkaClusterConfig, KafkaClusterManager
 from kafka_mcp_resources import (
+    BrokerEntry,
     get_brokers_resource,
     get_topics_resource,
     get_consumer_groups_resource,
@@ -36,81 +28,148 @@ from kafka_mcp_tools import (
 )
 import kafka_mcp_tools
 import kafka_mcp_resources
+from test_utils import FakeAdminClient, FakeBroker, FakeConsumerGroup, FakeMetadata, FakePartition, FakeTopic
+
+
+# Cluster configs are frozen, so managers can share them through a shallow copy
+_RESOURCE_CLUSTERS = {
+    "test-cluster-1": KafkaClusterConfig(name="test-cluster-1", bootstrap_servers="localhost:9092", viewonly=False),
+    "test-cluster-2": KafkaClusterConfig(name="test-cluster-2", bootstrap_servers="localhost:9093", viewonly=True),
+}
+_BASELINE_CLUSTERS = {
+    "cluster1": KafkaClusterConfig(name="cluster1", bootstrap_servers="localhost:9092"),
+    "cluster2": KafkaClusterConfig(name="cluster2", bootstrap_servers="localhost:9093"),
+}
+
+# list_consumer_groups() future, built once since tests only read it
+_CONSUMER_GROUPS = [FakeConsumerGroup(group_id="test-consumer-group")]
+_CONSUMER_GROUPS_RESULT = SimpleNamespace(result=lambda: _CONSUMER_GROUPS)
+
+# Payloads returned by the patched resource data helpers
+_ALL_BROKERS = {
+    "brokers": {
+        "cluster1": [
+            {"broker_id": 1, "host": "host1", "port": 9092, "cluster": "cluster1"}
+        ],
+        "cluster2": [
+            {"broker_id": 2, "host": "host2", "port": 9092, "cluster": "cluster2"}
+        ]
+    }
+}
+_CLUSTER1_BROKERS = {
+    "cluster": "cluster1",
+    "brokers": [
+        {"broker_id": 1, "host": "host1", "port": 9092, "cluster": "cluster1"}
+    ]
+}
+_ALL_TOPICS = {
+    "topics": {
+        "cluster1": [
+            {"name": "topic1", "partitions": 3, "cluster": "cluster1"}
+        ],
+        "cluster2": [
+            {"name": "topic2", "partitions": 6, "cluster": "cluster2"}
+        ]
+    }
+}
+_CLUSTER2_GROUPS = {
+    "cluster": "cluster2",
+    "consumer_groups": [
+        {"group_id": "group2", "state": "STABLE", "cluster": "cluster2"}
+    ]
+}
+_ALL_PARTITIONS = {
+    "partitions": {
+        "cluster1": [
+            {"topic": "topic1", "partition_id": 0, "cluster": "cluster1"},
+            {"topic": "topic1", "partition_id": 1, "cluster": "cluster1"},
+            {"topic": "topic2", "partition_id": 0, "cluster": "cluster1"}
+        ]
+    }
+}
+_CLUSTER1_PARTITIONS = {
+    "cluster": "cluster1",
+    "partitions": [
+        {"topic": "topic1", "partition_id": 0, "cluster": "cluster1"},
+        {"topic": "topic2", "partition_id": 0, "cluster": "cluster1"}
+    ]
+}
+_CLUSTER1_ONLY_BROKERS = {
+    "brokers": {
+        "cluster1": [
+            {"broker_id": 1, "host": "host1", "port": 9092, "cluster": "cluster1"}
+        ]
+    }
+}
+_BROKERS_ERROR = {
+    "brokers": {
+        "cluster1": {
+            "error": "Connection failed",
+            "status": "failed"
+        }
+    }
+}
+
+
+@pytest.fixture(scope="module")
+def mock_metadata():
+    """Mock Kafka metadata served by every patched admin client in this module."""
+    partition = FakePartition(leader=1, replicas=[1, 2, 3], isrs=[1, 2, 3])
+    return FakeMetadata(
+        cluster_id="kafka-cluster-test-cluster-1",
+        controller_id=1,
+        brokers={1: FakeBroker(host="localhost", port=9092)},
+        topics={"test-topic": FakeTopic(name="test-topic", partitions={0: partition, 1: partition})},
+    )
+
+
+@pytest.fixture(scope="module")
+def executor():
+    """Thread pool standing in for the cluster manager's executor."""
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        yield pool
+
+
+@pytest.fixture
+def mock_cluster_manager(monkeypatch, executor):
+    """MagicMock standing in for the resources module's cluster manager, with a real executor."""
+    manager = MagicMock(executor=executor)
+    monkeypatch.setattr(kafka_mcp_resources, "cluster_manager", manager)
+    return manager
+
+
+@pytest.fixture(scope="module")
+def fake_admin_client(mock_metadata):
+    """In-memory AdminClient serving mock_metadata, shared by the resource tests."""
+    return FakeAdminClient(mock_metadata)
 
 
 class TestNewResources:
     """Test the new MCP resources."""
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.manager = KafkaClusterManager()
-        
-        # Initialize cluster_manager in the imported modules
-        kafka_mcp_tools.set_cluster_manager(self.manager)
-        kafka_mcp_resources.set_cluster_manager(self.manager)
-        
-        # Add test clusters
-        self.manager.add_cluster(KafkaClusterConfig(
-            name="test-cluster-1",
-            bootstrap_servers="localhost:9092",
-            viewonly=False
-        ))
-        
-        self.manager.add_cluster(KafkaClusterConfig(
-            name="test-cluster-2", 
-            bootstrap_servers="localhost:9093",
-            viewonly=True
-        ))
-
-    def create_mock_metadata(self, cluster_name="test-cluster-1"):
-        """Create mock Kafka metadata for testing."""
-        mock_metadata = MagicMock()
-        
-        # Mock brokers
-        mock_broker = MagicMock()
-        mock_broker.host = "localhost"
-        mock_broker.port = 9092
-        mock_broker.rack = None
-        mock_metadata.brokers = {1: mock_broker}
-        
-        # Mock topics with partitions
-        mock_topic = MagicMock()
-        mock_partition = MagicMock()
-        mock_partition.leader = 1
-        mock_partition.replicas = [1, 2, 3]
-        mock_partition.isrs = [1, 2, 3]
-        mock_partition.error = None
-        mock_topic.partitions = {0: mock_partition, 1: mock_partition}
-        mock_metadata.topics = {"test-topic": mock_topic}
-        
-        return mock_metadata
-
-    def create_mock_consumer_groups(self):
-        """Create mock consumer groups for testing."""
-        mock_group = MagicMock()
-        mock_group.group_id = "test-consumer-group"
-        mock_group.is_simple_consumer_group = False
-        mock_group.state = MagicMock()
-        mock_group.state.name = "STABLE"
-        
-        mock_result = MagicMock()
-        mock_result.result.return_value = [mock_group]
-        
-        return mock_result
-
-    @patch('kafka_mcp_resources.cluster_manager')
+    @pytest.fixture(scope="class", autouse=True)
+    def manager(self, request):
+        """Cluster manager with two test clusters, registered once per class."""
+        manager = KafkaClusterManager()
+        manager.clusters = dict(_RESOURCE_CLUSTERS)
+        
+        # Register cluster_manager in the imported modules; the previous managers come back on teardown
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(kafka_mcp_tools, "cluster_manager", manager)
+            mp.setattr(kafka_mcp_resources, "cluster_manager", manager)
+            
+            request.cls.manager = manager
+            yield manager
+        manager.close()
+
     @pytest.mark.asyncio
-    async def test_get_brokers_resource(self, mock_cluster_manager):
+    async def test_get_brokers_resource(self, mock_cluster_manager, fake_admin_client):
         """Test kafka://brokers resource."""
-        # Mock the cluster manager - mock clusters as MagicMock so .keys() is mockable
-        mock_clusters = MagicMock()
-        mock_clusters.keys.return_value = ["test-cluster-1", "test-cluster-2"]
-        mock_cluster_manager.clusters = mock_clusters
+        # Mock the cluster manager - resources only read the cluster names
+        mock_cluster_manager.clusters = {"test-cluster-1": None, "test-cluster-2": None}
         
-        # Mock admin clients
-        mock_admin_client = MagicMock()
-        mock_admin_client.list_topics.return_value = self.create_mock_metadata()
-        mock_cluster_manager.get_admin_client.return_value = mock_admin_client
+        # Serve metadata from the in-memory admin client
+        mock_cluster_manager.get_admin_client.return_value = fake_admin_client
         
         # Test the resource
         result_json = await get_brokers_resource()
@@ -121,29 +180,20 @@ class TestNewResources:
         assert "timestamp" in result
         assert isinstance(result["brokers"], dict)
         
-        # Verify broker data for each cluster
+        # Verify broker data for each cluster against the BrokerEntry contract
         for cluster_name in ["test-cluster-1", "test-cluster-2"]:
-            if cluster_name in result["brokers"] and isinstance(result["brokers"][cluster_name], list):
-                broker = result["brokers"][cluster_name][0]
-                assert "broker_id" in broker
-                assert "host" in broker
-                assert "port" in broker
-                assert "cluster" in broker
-                assert broker["cluster"] == cluster_name
-
-    @patch('kafka_mcp_resources.cluster_manager')
+            broker = result["brokers"][cluster_name][0]
+            assert broker.keys() == BrokerEntry.__required_keys__
+            assert broker["cluster"] == cluster_name
+
     @pytest.mark.asyncio
-    async def test_get_topics_resource(self, mock_cluster_manager):
+    async def test_get_topics_resource(self, mock_cluster_manager, fake_admin_client):
         """Test kafka://topics resource."""
-        # Mock the cluster manager - mock clusters as MagicMock so .keys() is mockable
-        mock_clusters = MagicMock()
-        mock_clusters.keys.return_value = ["test-cluster-1"]
-        mock_cluster_manager.clusters = mock_clusters
+        # Mock the cluster manager - resources only read the cluster names
+        mock_cluster_manager.clusters = {"test-cluster-1": None}
         
-        # Mock admin client
-        mock_admin_client = MagicMock()
-        mock_admin_client.list_topics.return_value = self.create_mock_metadata()
-        mock_cluster_manager.get_admin_client.return_value = mock_admin_client
+        # Serve metadata from the in-memory admin client
+        mock_cluster_manager.get_admin_client.return_value = fake_admin_client
         
         # Test the resource
         result_json = await get_topics_resource()
@@ -155,26 +205,22 @@ class TestNewResources:
         assert isinstance(result["topics"], dict)
         
         # Verify topic data
-        if "test-cluster-1" in result["topics"] and isinstance(result["topics"]["test-cluster-1"], list):
-            topic = result["topics"]["test-cluster-1"][0]
-            assert "name" in topic
-            assert "partitions" in topic
-            assert "replication_factor" in topic
-            assert "cluster" in topic
-            assert topic["cluster"] == "test-cluster-1"
-
-    @patch('kafka_mcp_resources.cluster_manager')
+        topic = result["topics"]["test-cluster-1"][0]
+        assert "name" in topic
+        assert "partitions" in topic
+        assert "replication_factor" in topic
+        assert "cluster" in topic
+        assert topic["cluster"] == "test-cluster-1"
+
     @pytest.mark.asyncio
     async def test_get_consumer_groups_resource(self, mock_cluster_manager):
         """Test kafka://consumer-groups resource."""
-        # Mock the cluster manager - mock clusters as MagicMock so .keys() is mockable
-        mock_clusters = MagicMock()
-        mock_clusters.keys.return_value = ["test-cluster-1"]
-        mock_cluster_manager.clusters = mock_clusters
+        # Mock the cluster manager - resources only read the cluster names
+        mock_cluster_manager.clusters = {"test-cluster-1": None}
         
         # Mock admin client
         mock_admin_client = MagicMock()
-        mock_admin_client.list_consumer_groups.return_value = self.create_mock_consumer_groups()
+        mock_admin_client.list_consumer_groups.return_value = _CONSUMER_GROUPS_RESULT
         mock_cluster_manager.get_admin_client.return_value = mock_admin_client
         
         # Test the resource
@@ -186,19 +232,14 @@ class TestNewResources:
         assert "timestamp" in result
         assert isinstance(result["consumer_groups"], dict)
 
-    @patch('kafka_mcp_resources.cluster_manager')
     @pytest.mark.asyncio
-    async def test_get_partitions_resource(self, mock_cluster_manager):
+    async def test_get_partitions_resource(self, mock_cluster_manager, fake_admin_client):
         """Test kafka://partitions resource."""
-        # Mock the cluster manager - mock clusters as MagicMock so .keys() is mockable
-        mock_clusters = MagicMock()
-        mock_clusters.keys.return_value = ["test-cluster-1"]
-        mock_cluster_manager.clusters = mock_clusters
+        # Mock the cluster manager - resources only read the cluster names
+        mock_cluster_manager.clusters = {"test-cluster-1": None}
         
-        # Mock admin client
-        mock_admin_client = MagicMock()
-        mock_admin_client.list_topics.return_value = self.create_mock_metadata()
-        mock_cluster_manager.get_admin_client.return_value = mock_admin_client
+        # Serve metadata from the in-memory admin client
+        mock_cluster_manager.get_admin_client.return_value = fake_admin_client
         
         # Test the resource
         result_json = await get_partitions_resource()
@@ -210,56 +251,158 @@ class TestNewResources:
         assert isinstance(result["partitions"], dict)
         
         # Verify partition data
-        if "test-cluster-1" in result["partitions"] and isinstance(result["partitions"]["test-cluster-1"], list):
-            partition = result["partitions"]["test-cluster-1"][0]
-            assert "topic" in partition
-            assert "partition_id" in partition
-            assert "leader" in partition
-            assert "replicas" in partition
-            assert "cluster" in partition
-            assert partition["cluster"] == "test-cluster-1"
+        partition = result["partitions"]["test-cluster-1"][0]
+        assert "topic" in partition
+        assert "partition_id" in partition
+        assert "leader" in partition
+        assert "replicas" in partition
+        assert "cluster" in partition
+        assert partition["cluster"] == "test-cluster-1"
 
+    @pytest.mark.asyncio
+    async def test_metadata_cache_shared_across_resources(self, mock_cluster_manager, fake_admin_client):
+        """Test that brokers, topics and partitions share one list_topics call per cluster."""
+        mock_cluster_manager.clusters = {"test-cluster-1": None}
+        mock_admin_client = MagicMock(wraps=fake_admin_client)
+        mock_cluster_manager.get_admin_client.return_value = mock_admin_client
+        
+        await get_brokers_resource()
+        await get_topics_resource()
+        await get_partitions_resource()
+        
+        assert mock_admin_client.list_topics.call_count == 1
+        
+        # An expired entry is fetched again
+        with patch.object(kafka_mcp_resources, "METADATA_TTL_SECONDS", 0):
+            await get_brokers_resource()
+        assert mock_admin_client.list_topics.call_count == 2
 
-class TestNewTools:
-    """Test the new MCP tools that use resources."""
+    @pytest.mark.asyncio
+    async def test_resources_run_admin_calls_on_manager_executor(self, mock_cluster_manager, executor, mock_metadata):
+        """Test that metadata and consumer group fetches share the cluster manager's executor with the tools."""
+        mock_cluster_manager.clusters = {"test-cluster-1": None}
+        mock_cluster_manager.executor = MagicMock(wraps=executor)
+        mock_admin_client = MagicMock()
+        mock_admin_client.list_topics.return_value = mock_metadata
+        mock_admin_client.list_consumer_groups.return_value = _CONSUMER_GROUPS_RESULT
+        mock_cluster_manager.get_admin_client.return_value = mock_admin_client
+        
+        await get_brokers_resource()
+        await get_consumer_groups_resource()
+        
+        assert mock_cluster_manager.executor.submit.call_count == 2
 
-    def setup_method(self):
-        """Set up test fixtures."""
-        self.manager = KafkaClusterManager()
+    @pytest.mark.asyncio
+    async def test_metadata_cache_sweeps_expired_entries(self, mock_cluster_manager, fake_admin_client):
+        """Test that per-topic cache entries do not outlive the TTL once another fetch happens."""
+        mock_cluster_manager.get_admin_client.return_value = fake_admin_client
         
-        # Initialize cluster_manager in the imported modules
-        kafka_mcp_tools.set_cluster_manager(self.manager)
-        kafka_mcp_resources.set_cluster_manager(self.manager)
+        for topic in ("topic-a", "topic-b", "topic-c"):
+            await kafka_mcp_resources._get_cluster_partitions_data("test-cluster-1", topic)
+        assert len(kafka_mcp_resources._metadata_cache) == 3
         
-        # Add test clusters
-        cluster1_config = KafkaClusterConfig(
-            name="cluster1",
-            bootstrap_servers="localhost:9092"
-        )
-        cluster2_config = KafkaClusterConfig(
-            name="cluster2", 
-            bootstrap_servers="localhost:9093"
+        # Every earlier entry has expired by the time the next fetch is stored
+        with patch.object(kafka_mcp_resources, "METADATA_TTL_SECONDS", 0):
+            await kafka_mcp_resources._get_cluster_partitions_data("test-cluster-1", "topic-d")
+        
+        assert list(kafka_mcp_resources._metadata_cache) == [("test-cluster-1", "topic-d")]
+
+    @pytest.mark.asyncio
+    async def test_partitions_tool_pushes_topic_filter_down(self, mock_cluster_manager, fake_admin_client):
+        """Test that a cluster and topic filter requests only that topic's metadata."""
+        mock_cluster_manager.clusters = {"test-cluster-1": None}
+        mock_admin_client = MagicMock(wraps=fake_admin_client)
+        mock_cluster_manager.get_admin_client.return_value = mock_admin_client
+
+        result = await get_partitions(cluster="test-cluster-1", topic="test-topic")
+
+        mock_admin_client.list_topics.assert_called_once_with(topic="test-topic", timeout=10)
+        assert [p["partition_id"] for p in result] == [0, 1]
+
+        # Without a cluster, every cluster is asked for just that topic
+        mock_cluster_manager.clusters = {"test-cluster-1": None, "test-cluster-2": None}
+        kafka_mcp_resources.clear_metadata_cache()
+        mock_admin_client.list_topics.reset_mock()
+
+        result = await get_partitions(topic="test-topic")
+
+        assert mock_admin_client.list_topics.call_count == 2
+        assert all(c.kwargs["topic"] == "test-topic" for c in mock_admin_client.list_topics.call_args_list)
+        assert len(result) == 4
+
+    @pytest.mark.asyncio
+    async def test_brokers_resource_queries_clusters_concurrently(self, mock_cluster_manager, mock_metadata):
+        """Test that a slow cluster does not hold up the others."""
+        mock_cluster_manager.clusters = {"test-cluster-1": None, "test-cluster-2": None}
+        # Each fetch waits for the other one to start; serialized fetches would break the barrier
+        both_fetching = threading.Barrier(2, timeout=5)
+        def overlapping_list_topics(topic=None, timeout=None):
+            both_fetching.wait()
+            return mock_metadata
+        
+        # One admin client per cluster so each cluster misses the metadata cache
+        admin_clients = {}
+        def get_admin_client(name):
+            return admin_clients.setdefault(name, MagicMock(list_topics=MagicMock(side_effect=overlapping_list_topics)))
+        mock_cluster_manager.get_admin_client.side_effect = get_admin_client
+        
+        result = json.loads(await get_brokers_resource())
+        
+        assert set(result["brokers"]) == {"test-cluster-1", "test-cluster-2"}
+        assert all(isinstance(brokers, list) for brokers in result["brokers"].values())
+        assert all(client.list_topics.call_count == 1 for client in admin_clients.values())
+
+    @pytest.mark.asyncio
+    async def test_brokers_resource_fan_out_fetches_each_cluster_once(self, mock_cluster_manager):
+        """Test that kafka://brokers over 10 clusters with 50 topics each sends one fetch per cluster."""
+        partition = FakePartition(leader=1, replicas=[1, 2, 3], isrs=[1, 2, 3])
+        metadata = FakeMetadata(
+            cluster_id="kafka-cluster-bench",
+            controller_id=1,
+            brokers={i: FakeBroker(host=f"broker-{i}", port=9092) for i in (1, 2, 3)},
+            topics={
+                f"topic-{i}": FakeTopic(name=f"topic-{i}", partitions={p: partition for p in range(6)})
+                for i in range(50)
+            },
         )
-        self.manager.clusters = {
-            "cluster1": cluster1_config,
-            "cluster2": cluster2_config
-        }
+        mock_cluster_manager.clusters = {f"cluster-{i}": None for i in range(10)}
+        mock_admin_client = MagicMock(wraps=FakeAdminClient(metadata))
+        mock_cluster_manager.get_admin_client.return_value = mock_admin_client
+        
+        rounds = 3
+        for _ in range(rounds):
+            # Exercise the fetch path, not cache hits
+            kafka_mcp_resources.clear_metadata_cache()
+            result = json.loads(await get_brokers_resource())
+        
+        assert all(len(brokers) == 3 for brokers in result["brokers"].values())
+        assert mock_admin_client.list_topics.call_count == rounds * len(mock_cluster_manager.clusters)
+
+
+class TestNewTools:
+    """Test the new MCP tools that use resources."""
 
-    @patch('kafka_mcp_resources.get_brokers_resource')
+    @pytest.fixture(scope="class", autouse=True)
+    def manager(self, request):
+        """Cluster manager with cluster1 and cluster2, registered once per class."""
+        manager = KafkaClusterManager()
+        manager.clusters = dict(_BASELINE_CLUSTERS)
+        
+        # Register cluster_manager in the imported modules; the previous managers come back on teardown
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(kafka_mcp_tools, "cluster_manager", manager)
+            mp.setattr(kafka_mcp_resources, "cluster_manager", manager)
+            
+            request.cls.manager = manager
+            yield manager
+        manager.close()
+
+    @patch('kafka_mcp_resources._get_brokers_data')
     @pytest.mark.asyncio
     async def test_get_brokers_tool_all_clusters(self, mock_resource):
         """Test get_brokers tool without cluster filter."""
         # Mock resource response
-        mock_resource.return_value = json.dumps({
-            "brokers": {
-                "cluster1": [
-                    {"broker_id": 1, "host": "host1", "port": 9092, "cluster": "cluster1"}
-                ],
-                "cluster2": [
-                    {"broker_id": 2, "host": "host2", "port": 9092, "cluster": "cluster2"}
-                ]
-            }
-        })
+        mock_resource.return_value = _ALL_BROKERS
         
         result = await list_brokers()
         
@@ -268,17 +411,28 @@ class TestNewTools:
         assert result[0]["cluster"] in ["cluster1", "cluster2"]
         assert result[1]["cluster"] in ["cluster1", "cluster2"]
 
-    @patch('kafka_mcp_resources.get_cluster_brokers_resource')
+    @patch('kafka_mcp_resources._get_brokers_data')
+    @pytest.mark.asyncio
+    async def test_get_brokers_tool_merges_large_clusters(self, mock_resource):
+        """Test get_brokers tool merges hundreds of brokers per cluster in order."""
+        mock_resource.return_value = {
+            "brokers": {
+                name: [{"broker_id": i, "host": f"host{i}", "port": 9092, "cluster": name} for i in range(250)]
+                for name in ("cluster2", "cluster1")
+            }
+        }
+        
+        result = await list_brokers()
+        
+        assert len(result) == 500
+        assert [(b["cluster"], b["broker_id"]) for b in result[249:251]] == [("cluster1", 249), ("cluster2", 0)]
+
+    @patch('kafka_mcp_resources._get_cluster_brokers_data')
     @pytest.mark.asyncio
     async def test_get_brokers_tool_specific_cluster(self, mock_cluster_resource):
         """Test get_brokers tool with cluster filter."""
         # Mock cluster-specific resource response
-        mock_cluster_resource.return_value = json.dumps({
-            "cluster": "cluster1",
-            "brokers": [
-                {"broker_id": 1, "host": "host1", "port": 9092, "cluster": "cluster1"}
-            ]
-        })
+        mock_cluster_resource.return_value = _CLUSTER1_BROKERS
         
         result = await list_brokers(cluster="cluster1")
         
@@ -286,21 +440,12 @@ class TestNewTools:
         assert len(result) == 1
         assert result[0]["cluster"] == "cluster1"
 
-    @patch('kafka_mcp_resources.get_topics_resource')
+    @patch('kafka_mcp_resources._get_topics_data')
     @pytest.mark.asyncio
     async def test_get_topics_tool_all_clusters(self, mock_resource):
         """Test get_topics tool without cluster filter."""
         # Mock resource response
-        mock_resource.return_value = json.dumps({
-            "topics": {
-                "cluster1": [
-                    {"name": "topic1", "partitions": 3, "cluster": "cluster1"}
-                ],
-                "cluster2": [
-                    {"name": "topic2", "partitions": 6, "cluster": "cluster2"}
-                ]
-            }
-        })
+        mock_resource.return_value = _ALL_TOPICS
         
         result = await list_topics()
         
@@ -309,17 +454,12 @@ class TestNewTools:
         assert result[0]["name"] in ["topic1", "topic2"]
         assert result[1]["name"] in ["topic1", "topic2"]
 
-    @patch('kafka_mcp_resources.get_cluster_consumer_groups_resource')
+    @patch('kafka_mcp_resources._get_cluster_consumer_groups_data')
     @pytest.mark.asyncio
     async def test_get_consumer_groups_tool_specific_cluster(self, mock_cluster_resource):
         """Test get_consumer_groups tool with cluster filter."""
         # Mock cluster-specific resource response
-        mock_cluster_resource.return_value = json.dumps({
-            "cluster": "cluster2",
-            "consumer_groups": [
-                {"group_id": "group2", "state": "STABLE", "cluster": "cluster2"}
-            ]
-        })
+        mock_cluster_resource.return_value = _CLUSTER2_GROUPS
         
         result = await list_consumer_groups(cluster="cluster2")
         
@@ -328,20 +468,12 @@ class TestNewTools:
         assert result[0]["cluster"] == "cluster2"
         assert result[0]["group_id"] == "group2"
 
-    @patch('kafka_mcp_resources.get_partitions_resource')
+    @patch('kafka_mcp_resources._get_partitions_data')
     @pytest.mark.asyncio
     async def test_get_partitions_tool_with_topic_filter(self, mock_resource):
         """Test get_partitions tool with topic filter."""
         # Mock resource response
-        mock_resource.return_value = json.dumps({
-            "partitions": {
-                "cluster1": [
-                    {"topic": "topic1", "partition_id": 0, "cluster": "cluster1"},
-                    {"topic": "topic1", "partition_id": 1, "cluster": "cluster1"},
-                    {"topic": "topic2", "partition_id": 0, "cluster": "cluster1"}
-                ]
-            }
-        })
+        mock_resource.return_value = _ALL_PARTITIONS
         
         result = await get_partitions(topic="topic1")
         
@@ -350,18 +482,12 @@ class TestNewTools:
         for partition in result:
             assert partition["topic"] == "topic1"
 
-    @patch('kafka_mcp_resources.get_cluster_partitions_resource')
+    @patch('kafka_mcp_resources._get_cluster_partitions_data')
     @pytest.mark.asyncio
     async def test_get_partitions_tool_with_cluster_and_topic_filter(self, mock_cluster_resource):
         """Test get_partitions tool with both cluster and topic filters."""
         # Mock cluster-specific resource response
-        mock_cluster_resource.return_value = json.dumps({
-            "cluster": "cluster1",
-            "partitions": [
-                {"topic": "topic1", "partition_id": 0, "cluster": "cluster1"},
-                {"topic": "topic2", "partition_id": 0, "cluster": "cluster1"}
-            ]
-        })
+        mock_cluster_resource.return_value = _CLUSTER1_PARTITIONS
         
         result = await get_partitions(cluster="cluster1", topic="topic1")
         
@@ -370,35 +496,22 @@ class TestNewTools:
         assert result[0]["topic"] == "topic1"
         assert result[0]["cluster"] == "cluster1"
 
-    @patch('kafka_mcp_resources.get_brokers_resource')
+    @patch('kafka_mcp_resources._get_brokers_data')
     @pytest.mark.asyncio
     async def test_get_brokers_tool_nonexistent_cluster(self, mock_resource):
         """Test get_brokers tool with nonexistent cluster."""
         # Mock resource response
-        mock_resource.return_value = json.dumps({
-            "brokers": {
-                "cluster1": [
-                    {"broker_id": 1, "host": "host1", "port": 9092, "cluster": "cluster1"}
-                ]
-            }
-        })
+        mock_resource.return_value = _CLUSTER1_ONLY_BROKERS
         
         with pytest.raises(ValueError, match="Cluster 'nonexistent' not found"):
             await list_brokers(cluster="nonexistent")
 
-    @patch('kafka_mcp_resources.get_brokers_resource')
+    @patch('kafka_mcp_resources._get_brokers_data')
     @pytest.mark.asyncio
     async def test_tools_handle_error_responses(self, mock_resource):
         """Test that tools handle error responses from resources."""
         # Mock resource response with error
-        mock_resource.return_value = json.dumps({
-            "brokers": {
-                "cluster1": {
-                    "error": "Connection failed",
-                    "status": "failed"
-                }
-            }
-        })
+        mock_resource.return_value = _BROKERS_ERROR
         
         result = await list_brokers()
         
@@ -409,14 +522,11 @@ class TestNewTools:
 class TestResourceErrorHandling:
     """Test error handling in resources."""
 
-    @patch('kafka_mcp_resources.cluster_manager')
     @pytest.mark.asyncio
     async def test_brokers_resource_connection_error(self, mock_cluster_manager):
         """Test kafka://brokers resource handles connection errors."""
-        # Mock cluster manager with error - mock clusters as MagicMock so .keys() is mockable
-        mock_clusters = MagicMock()
-        mock_clusters.keys.return_value = ["test-cluster"]
-        mock_cluster_manager.clusters = mock_clusters
+        # Mock the cluster manager - resources only read the cluster names
+        mock_cluster_manager.clusters = {"test-cluster": None}
         mock_admin_client = MagicMock()
         mock_admin_client.list_topics.side_effect = Exception("Connection failed")
         mock_cluster_manager.get_admin_client.return_value = mock_admin_client
@@ -431,6 +541,25 @@ class TestResourceErrorHandling:
         assert "status" in result["brokers"]["test-cluster"]
         assert result["brokers"]["test-cluster"]["status"] == "failed"
 
+    @pytest.mark.asyncio
+    async def test_brokers_resource_retries_after_failed_fetch(self, mock_cluster_manager, mock_metadata):
+        """Test that a failed metadata fetch is retried on the next call rather than remembered."""
+        mock_cluster_manager.clusters = {"test-cluster": None}
+        mock_admin_client = MagicMock()
+        mock_admin_client.list_topics.side_effect = Exception("Connection failed")
+        mock_cluster_manager.get_admin_client.return_value = mock_admin_client
+        
+        result = json.loads(await get_brokers_resource())
+        assert result["brokers"]["test-cluster"]["status"] == "failed"
+        
+        # Once the cluster recovers, the next call fetches again
+        mock_admin_client.list_topics.side_effect = None
+        mock_admin_client.list_topics.return_value = mock_metadata
+        result = json.loads(await get_brokers_resource())
+        
+        assert isinstance(result["brokers"]["test-cluster"], list)
+        assert mock_admin_client.list_topics.call_count == 2
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"]) 
\ No newline at end of file
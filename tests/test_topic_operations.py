@@ -5,68 +5,86 @@ Tests for topic management functionality including listing, describing, and conf
 """
 
 import asyncio
-import os
-import subprocess
-import sys
-from unittest.mock import patch
+import re
+import time
+from functools import partial
 
 import pytest
+from confluent_kafka.admin import ConfigResource, NewTopic
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from test_utils import unique_name
 
-from kafka_cluster_manager import (
-    KafkaClusterManager, 
-    load_cluster_configurations
-)
-from test_utils import run_docker_compose
+# Characters and sequences that make a topic name problematic, matched in one scan
+_INVALID_TOPIC_RE = re.compile(r"[ /\\]|\.\.")
 
+@pytest.mark.integration
+@pytest.mark.xdist_group("kafka")
+@pytest.mark.usefixtures("require_kafka")
 class TestTopicOperations:
     """Test topic-related operations."""
     
-    @classmethod
-    def setup_class(cls):
-        """Set up test environment."""
-        # Check if Kafka is available
-        try:
-            result = run_docker_compose([
-                '-f', 'docker-compose.test.yml', 
-                'exec', '-T', 'kafka', 
-                'kafka-topics', '--bootstrap-server', 'localhost:9092', '--list'
-            ], capture_output=True, text=True, timeout=10)
-            
-            if result.returncode != 0:
-                pytest.skip("Kafka test environment not available")
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            pytest.skip("Docker or Kafka not available for integration tests")
+    @pytest.fixture(scope="class", autouse=True)
+    def _manager(self, request, kafka_manager):
+        """Share the session's single-cluster manager and its AdminClient with the class."""
+        request.cls.manager = kafka_manager
+        request.cls.admin_client = kafka_manager.get_admin_client()
     
-    def setup_method(self):
-        """Set up for each test method."""
-        # Configure environment for single cluster
-        self.env_patch = patch.dict(os.environ, {
-            'KAFKA_BOOTSTRAP_SERVERS': 'localhost:9092',
-            'KAFKA_SECURITY_PROTOCOL': 'PLAINTEXT',
-            'VIEWONLY': 'false'
-        })
-        self.env_patch.start()
-        
-        # Load cluster manager
-        self.manager = load_cluster_configurations()
+    @pytest.fixture(scope="class")
+    def class_topics(self, kafka_manager, kafka_available):
+        """Topics for this class, created and deleted with one admin request each."""
+        if not kafka_available:
+            pytest.skip("Kafka test environment not available")
+        
+        admin_client = kafka_manager.get_admin_client()
+        topics = {
+            "partition_details": NewTopic(unique_name("test-partition-details"), num_partitions=3, replication_factor=1),
+            "config": NewTopic(
+                unique_name("test-config-topic"),
+                num_partitions=2,
+                replication_factor=1,
+                config={
+                    'retention.ms': '86400000',  # 1 day
+                    'cleanup.policy': 'delete'
+                }
+            ),
+            "multi_partition": NewTopic(unique_name("test-multi-partition"), num_partitions=5, replication_factor=1),
+        }
+        names = [topic.topic for topic in topics.values()]
+        for future in admin_client.create_topics(list(topics.values()), request_timeout=10).values():
+            future.result()
+        
+        # Creation is acknowledged by the controller; wait until the metadata shows every topic
+        deadline = time.monotonic() + 10
+        while not set(names) <= admin_client.list_topics(timeout=5).topics.keys():
+            assert time.monotonic() < deadline, "Topics did not appear in metadata"
+            time.sleep(0.1)
+        
+        yield {key: topic.topic for key, topic in topics.items()}
+        
+        for future in admin_client.delete_topics(names, request_timeout=10).values():
+            future.result()
     
-    def teardown_method(self):
-        """Clean up after each test method."""
-        self.env_patch.stop()
-        self.manager.executor.shutdown(wait=True)
+    @pytest.fixture(scope="class")
+    def class_topic_configs(self, kafka_manager, class_topics):
+        """Configs of every class topic, fetched with a single describe_configs request."""
+        admin_client = kafka_manager.get_admin_client()
+        resources = {key: ConfigResource(ConfigResource.Type.TOPIC, name) for key, name in class_topics.items()}
+        futures = admin_client.describe_configs(list(resources.values()), request_timeout=10)
+        
+        return {
+            key: {name: entry.value for name, entry in futures[resource].result().items()}
+            for key, resource in resources.items()
+        }
     
     @pytest.mark.asyncio
     async def test_list_topics_filters_internal(self):
         """Test that list_topics properly filters internal topics."""
-        admin_client = self.manager.get_admin_client()
+        admin_client = self.admin_client
         
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         metadata = await loop.run_in_executor(
             self.manager.executor,
-            lambda: admin_client.list_topics(timeout=10)
+            partial(admin_client.list_topics, timeout=10)
         )
         
         # Get all topics (including internal)
@@ -88,205 +106,93 @@ class TestTopicOperations:
     @pytest.mark.asyncio
     async def test_describe_nonexistent_topic(self):
         """Test describing a topic that doesn't exist."""
-        admin_client = self.manager.get_admin_client()
+        admin_client = self.admin_client
         
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         
         # Try to get metadata for non-existent topic
         metadata = await loop.run_in_executor(
             self.manager.executor,
-            lambda: admin_client.list_topics(topic="nonexistent-topic", timeout=10)
+            partial(admin_client.list_topics, topic="nonexistent-topic", timeout=10)
         )
         
         # Should not contain the non-existent topic
         assert "nonexistent-topic" not in metadata.topics
     
     @pytest.mark.asyncio
-    async def test_topic_partition_details(self):
+    async def test_topic_partition_details(self, class_topics):
         """Test getting detailed partition information for a topic."""
-        admin_client = self.manager.get_admin_client()
-        
-        # Create a test topic with specific partition count
-        from confluent_kafka.admin import NewTopic
-        topic_name = "test-partition-details"
+        admin_client = self.admin_client
+        topic_name = class_topics["partition_details"]
         partition_count = 3
         replication_factor = 1
         
-        new_topic = NewTopic(
-            topic_name, 
-            num_partitions=partition_count, 
-            replication_factor=replication_factor
-        )
-        
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         
-        # Create topic
-        await loop.run_in_executor(
+        # Get topic metadata
+        metadata = await loop.run_in_executor(
             self.manager.executor,
-            lambda: admin_client.create_topics([new_topic], request_timeout=10)
+            partial(admin_client.list_topics, topic=topic_name, timeout=10)
         )
         
-        # Wait for topic creation
-        await asyncio.sleep(2)
-        
-        try:
-            # Get topic metadata
-            metadata = await loop.run_in_executor(
-                self.manager.executor,
-                lambda: admin_client.list_topics(topic=topic_name, timeout=10)
-            )
-            
-            assert topic_name in metadata.topics
-            topic_metadata = metadata.topics[topic_name]
-            
-            # Verify partition count
-            assert len(topic_metadata.partitions) == partition_count
-            
-            # Verify partition details
-            for partition_id, partition_metadata in topic_metadata.partitions.items():
-                assert isinstance(partition_id, int)
-                assert partition_id >= 0 and partition_id < partition_count
-                assert hasattr(partition_metadata, 'leader')
-                assert hasattr(partition_metadata, 'replicas')
-                assert hasattr(partition_metadata, 'isrs')
-                assert len(partition_metadata.replicas) == replication_factor
-                
-        finally:
-            # Clean up - delete the test topic
-            await loop.run_in_executor(
-                self.manager.executor,
-                lambda: admin_client.delete_topics([topic_name], request_timeout=10)
-            )
-    
-    @pytest.mark.asyncio
-    async def test_topic_configuration_retrieval(self):
-        """Test retrieving topic configurations."""
-        admin_client = self.manager.get_admin_client()
-        
-        # Create a test topic with custom configuration
-        from confluent_kafka.admin import NewTopic, ConfigResource
-        topic_name = "test-config-topic"
-        
-        new_topic = NewTopic(
-            topic_name, 
-            num_partitions=2, 
-            replication_factor=1,
-            config={
-                'retention.ms': '86400000',  # 1 day
-                'cleanup.policy': 'delete'
-            }
-        )
+        assert topic_name in metadata.topics
+        topic_metadata = metadata.topics[topic_name]
         
-        loop = asyncio.get_event_loop()
+        # Verify partition count
+        assert len(topic_metadata.partitions) == partition_count
         
-        # Create topic
-        await loop.run_in_executor(
-            self.manager.executor,
-            lambda: admin_client.create_topics([new_topic], request_timeout=10)
-        )
+        # Verify partition details
+        for partition_id, partition_metadata in topic_metadata.partitions.items():
+            assert isinstance(partition_id, int)
+            assert partition_id >= 0 and partition_id < partition_count
+            assert hasattr(partition_metadata, 'leader')
+            assert hasattr(partition_metadata, 'replicas')
+            assert hasattr(partition_metadata, 'isrs')
+            assert len(partition_metadata.replicas) == replication_factor
+    
+    def test_topic_configuration_retrieval(self, class_topic_configs):
+        """Test retrieving topic configurations."""
+        config_dict = class_topic_configs["config"]
         
-        # Wait for topic creation
-        await asyncio.sleep(2)
-        
-        try:
-            # Get topic configurations
-            config_resource = ConfigResource(ConfigResource.Type.TOPIC, topic_name)
-            configs = await loop.run_in_executor(
-                self.manager.executor,
-                lambda: admin_client.describe_configs([config_resource], request_timeout=10)
-            )
-            
-            assert config_resource in configs
-            config_result = configs[config_resource].result()
-            
-            # Verify our custom configurations are present
-            config_dict = {k: v.value for k, v in config_result.items()}
-            assert 'retention.ms' in config_dict
-            assert 'cleanup.policy' in config_dict
-            assert config_dict['cleanup.policy'] == 'delete'
-            
-        finally:
-            # Clean up - delete the test topic
-            await loop.run_in_executor(
-                self.manager.executor,
-                lambda: admin_client.delete_topics([topic_name], request_timeout=10)
-            )
+        # Verify our custom configurations are present
+        assert 'retention.ms' in config_dict
+        assert 'cleanup.policy' in config_dict
+        assert config_dict['cleanup.policy'] == 'delete'
     
     @pytest.mark.asyncio
-    async def test_topic_with_multiple_partitions(self):
+    async def test_topic_with_multiple_partitions(self, class_topics):
         """Test topic operations with multiple partitions and replicas."""
-        admin_client = self.manager.get_admin_client()
-        
-        # Create a topic with multiple partitions
-        from confluent_kafka.admin import NewTopic
-        topic_name = "test-multi-partition"
+        admin_client = self.admin_client
+        topic_name = class_topics["multi_partition"]
         partition_count = 5
         
-        new_topic = NewTopic(
-            topic_name, 
-            num_partitions=partition_count, 
-            replication_factor=1
-        )
+        loop = asyncio.get_running_loop()
         
-        loop = asyncio.get_event_loop()
-        
-        # Create topic
-        await loop.run_in_executor(
+        # Get topic metadata
+        metadata = await loop.run_in_executor(
             self.manager.executor,
-            lambda: admin_client.create_topics([new_topic], request_timeout=10)
+            partial(admin_client.list_topics, topic=topic_name, timeout=10)
         )
         
-        # Wait for topic creation
-        await asyncio.sleep(2)
-        
-        try:
-            # Get topic metadata
-            metadata = await loop.run_in_executor(
-                self.manager.executor,
-                lambda: admin_client.list_topics(topic=topic_name, timeout=10)
-            )
-            
-            topic_metadata = metadata.topics[topic_name]
-            
-            # Verify all partitions are present
-            assert len(topic_metadata.partitions) == partition_count
-            
-            # Verify partition IDs are sequential
-            partition_ids = sorted(topic_metadata.partitions.keys())
-            expected_ids = list(range(partition_count))
-            assert partition_ids == expected_ids
-            
-            # Verify each partition has a leader
-            for partition_metadata in topic_metadata.partitions.values():
-                assert partition_metadata.leader >= 0  # Valid broker ID
-                assert len(partition_metadata.replicas) == 1  # Single replica
-                assert len(partition_metadata.isrs) == 1  # In-sync replicas
-                
-        finally:
-            # Clean up - delete the test topic
-            await loop.run_in_executor(
-                self.manager.executor,
-                lambda: admin_client.delete_topics([topic_name], request_timeout=10)
-            )
+        topic_metadata = metadata.topics[topic_name]
+        
+        # Verify all partitions are present
+        assert len(topic_metadata.partitions) == partition_count
+        
+        # Verify partition IDs are sequential
+        partition_ids = sorted(topic_metadata.partitions.keys())
+        expected_ids = list(range(partition_count))
+        assert partition_ids == expected_ids
+        
+        # Verify each partition has a leader
+        for partition_metadata in topic_metadata.partitions.values():
+            assert partition_metadata.leader >= 0  # Valid broker ID
+            assert len(partition_metadata.replicas) == 1  # Single replica
+            assert len(partition_metadata.isrs) == 1  # In-sync replicas
 
 class TestTopicValidation:
     """Test topic validation and error handling."""
     
-    def setup_method(self):
-        """Set up for each test method."""
-        self.env_patch = patch.dict(os.environ, {
-            'KAFKA_BOOTSTRAP_SERVERS': 'localhost:9092',
-            'KAFKA_SECURITY_PROTOCOL': 'PLAINTEXT',
-            'VIEWONLY': 'false'
-        })
-        self.env_patch.start()
-        self.manager = load_cluster_configurations()
-    
-    def teardown_method(self):
-        """Clean up after each test method."""
-        self.env_patch.stop()
-        self.manager.executor.shutdown(wait=True)
-    
     def test_invalid_topic_name_characters(self):
         """Test validation of topic names with invalid characters."""
         # Kafka topic names have specific character restrictions
@@ -302,7 +208,7 @@ class TestTopicValidation:
         # For now, we just validate that these are problematic names
         for invalid_name in invalid_names:
             # Each name has characteristics that might cause issues
-            assert " " in invalid_name or "/" in invalid_name or "\\" in invalid_name or ".." in invalid_name or invalid_name.isupper()
+            assert _INVALID_TOPIC_RE.search(invalid_name) or invalid_name.isupper()
     
     def test_topic_name_length_limits(self):
         """Test topic name length validation."""
@@ -350,14 +256,15 @@ class TestTopicSorting:
             "_schemas",  # Schema registry topic
         ]
         
-        # Filter internal topics (simulating MCP tool behavior)
-        user_topics = [name for name in all_topics if not name.startswith('__') and not name.startswith('_')]
+        # Split user and internal topics in one pass (simulating MCP tool behavior)
+        user_topics, internal_topics = [], []
+        for name in all_topics:
+            (internal_topics if name.startswith('_') else user_topics).append(name)
         
         expected_user_topics = ["user-events", "order-updates", "payment-notifications"]
         assert user_topics == expected_user_topics
         
         # Verify internal topics are identified correctly
-        internal_topics = [name for name in all_topics if name.startswith('__') or name.startswith('_')]
         expected_internal = ["__consumer_offsets", "__transaction_state", "_schemas"]
         assert internal_topics == expected_internal
 
@@ -1,49 +1,112 @@
 """Utility functions for tests."""
-import subprocess
-import shutil
+import asyncio
+import os
+import time
+import uuid
+from dataclasses import dataclass, field, replace
+from functools import partial
+from typing import Any, Dict, List, Optional
 
 
-def get_docker_compose_cmd():
+@dataclass(slots=True, frozen=True)
+class FakeBroker:
+    """Stand-in for confluent_kafka BrokerMetadata."""
+    host: str
+    port: int = 9092
+    rack: Optional[str] = None
+
+
+@dataclass(slots=True, frozen=True)
+class FakePartition:
+    """Stand-in for confluent_kafka PartitionMetadata."""
+    leader: int
+    replicas: List[int]
+    isrs: List[int]
+    error: Any = None
+
+
+@dataclass(slots=True, frozen=True)
+class FakeTopic:
+    """Stand-in for confluent_kafka TopicMetadata."""
+    name: str
+    partitions: Dict[int, FakePartition] = field(default_factory=dict)
+
+
+@dataclass(slots=True, frozen=True)
+class FakeMetadata:
+    """Stand-in for the ClusterMetadata returned by AdminClient.list_topics()."""
+    cluster_id: str
+    controller_id: int
+    brokers: Dict[int, FakeBroker] = field(default_factory=dict)
+    topics: Dict[str, FakeTopic] = field(default_factory=dict)
+
+
+@dataclass(slots=True, frozen=True)
+class FakeGroupState:
+    """Stand-in for the ConsumerGroupState enum member."""
+    name: str
+
+
+@dataclass(slots=True, frozen=True)
+class FakeConsumerGroup:
+    """Stand-in for confluent_kafka ConsumerGroupListing."""
+    group_id: str
+    is_simple_consumer_group: bool = False
+    state: FakeGroupState = field(default_factory=lambda: FakeGroupState("STABLE"))
+
+
+class FakeAdminClient:
+    """In-memory stand-in for confluent_kafka AdminClient serving fixed metadata."""
+
+    def __init__(self, metadata):
+        self.metadata = metadata
+
+    def list_topics(self, topic=None, timeout=-1):
+        """Return the metadata, narrowed to one topic when topic is given."""
+        if topic is None:
+            return self.metadata
+        return replace(self.metadata, topics={
+            name: value for name, value in self.metadata.topics.items() if name == topic
+        })
+
+
+def unique_name(prefix):
     """
-    Determine which docker compose command to use.
+    Build a Kafka topic or group name that no other test run or xdist worker uses.
     
-    Returns:
-        list: Command parts for docker compose (e.g., ['docker', 'compose'] or ['docker-compose'])
+    Args:
+        prefix: Readable name prefix (e.g., 'test-consumer-group')
     
-    Raises:
-        RuntimeError: If neither docker compose command is available
+    Returns:
+        str: Prefix followed by the xdist worker id and a random suffix
     """
-    # Try Docker Compose V2 (docker compose)
-    try:
-        result = subprocess.run(['docker', 'compose', 'version'], 
-                              capture_output=True, check=True)
-        return ['docker', 'compose']
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        pass
-    
-    # Try Docker Compose V1 (docker-compose)
-    if shutil.which('docker-compose'):
-        try:
-            result = subprocess.run(['docker-compose', '--version'], 
-                                  capture_output=True, check=True)
-            return ['docker-compose']
-        except subprocess.CalledProcessError:
-            pass
-    
-    raise RuntimeError("Neither 'docker compose' nor 'docker-compose' is available")
+    worker_id = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    return f"{prefix}-{worker_id}-{uuid.uuid4().hex[:8]}"
 
 
-def run_docker_compose(args, **kwargs):
+async def await_topic(admin_client, executor, name, timeout=5.0):
     """
-    Run a docker compose command with auto-detection of the right command.
+    Poll topic metadata until every partition of a new topic has a leader.
     
     Args:
-        args: Arguments to pass to docker compose (after the base command)
-        **kwargs: Additional arguments to pass to subprocess.run()
+        admin_client: AdminClient connected to the cluster
+        executor: Executor to run the blocking list_topics() calls on
+        name: Topic name to wait for
+        timeout: Seconds to wait before giving up
     
     Returns:
-        subprocess.CompletedProcess: Result of the subprocess.run() call
+        The topic's metadata once it is ready
+    
+    Raises:
+        TimeoutError: If the topic is not ready within timeout seconds
     """
-    cmd = get_docker_compose_cmd()
-    full_cmd = cmd + args
-    return subprocess.run(full_cmd, **kwargs) 
\ No newline at end of file
+    loop = asyncio.get_running_loop()
+    deadline = time.monotonic() + timeout
+    while True:
+        metadata = await loop.run_in_executor(executor, partial(admin_client.list_topics, topic=name, timeout=2))
+        topic = metadata.topics.get(name)
+        if topic is not None and topic.partitions and all(p.leader >= 0 for p in topic.partitions.values()):
+            return topic
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Topic '{name}' not ready after {timeout}s")
+        await asyncio.sleep(0.05)